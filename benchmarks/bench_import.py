@@ -0,0 +1,87 @@
+"""
+Import-time budget: how long a fresh interpreter takes to import each entry
+module, measured with `python -X importtime` in a subprocess (best of `repeat`).
+Runs without DB settings and with a tokens directory that does not exist, so an
+import that connects, reads credentials or creates files fails here instead of
+slowing every short-lived job.
+
+    python -m benchmarks.bench_import              # exits 1 if a module is over budget
+    BENCH_IMPORT_BUDGET_SCALE=2 python -m benchmarks.bench_import   # slow machines
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds per module, cumulative over everything it imports
+IMPORT_BUDGETS = {
+    "src.transform": 0.25,
+    "src.fetch": 0.15,
+    "src.auth": 0.15,
+    "src.db": 0.60,
+    "src.reauth_all": 0.25,
+    "src.main": 0.90,
+}
+BUDGET_SCALE = float(os.getenv("BENCH_IMPORT_BUDGET_SCALE", "1"))
+
+# Settings that must not be needed just to import
+_UNSET = ("user", "password", "host", "dbname", "YOUTUBE_API_KEY")
+
+
+# Total import time of `module` in seconds: the sum of the top-level entries of -X importtime.
+def _import_seconds(module: str, env: dict) -> float:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Top-level imports are indented by exactly one space
+        if parts[2].startswith(" ") and not parts[2].startswith("  "):
+            total_us += int(parts[1])
+    return total_us / 1e6
+
+def run(repeat: int = 3, budgets: dict[str, float] = IMPORT_BUDGETS) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tokens_dir = Path(tmp) / "tokens"
+        env = {k: v for k, v in os.environ.items() if k not in _UNSET}
+        env.update(YT_TOKENS_DIR=str(tokens_dir), YT_STATE_DIR=str(Path(tmp) / "state"))
+        for module, budget in budgets.items():
+            best = min(_import_seconds(module, env) for _ in range(max(1, repeat)))
+            if tokens_dir.exists():
+                raise RuntimeError(f"import {module} created the tokens directory")
+            budget *= BUDGET_SCALE
+            results[f"import.{module}"] = {
+                "seconds": round(best, 6),
+                "budget": budget,
+                "over_budget": best > budget,
+            }
+    return results
+
+def over_budget(results: dict) -> list[str]:
+    return [name for name, res in sorted(results.items()) if res.get("over_budget")]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Import-time budget check for the entry modules.")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+    results = run(args.repeat)
+    print(json.dumps(results, indent=1))
+    failed = over_budget(results)
+    if failed:
+        print(f"Over import budget: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+End-to-end ingest_all over synthetic channels against the scratch Postgres in
+BENCH_DATABASE_URL. By default the API clients are in-process fakes; --http
+serves the same data from benchmarks/fake_api.py instead, so the real clients,
+transport, rate limiter and retries are exercised too (with injected faults).
+Measures a cold run (every video new) and a warm re-run (nothing changed).
+
+    BENCH_DATABASE_URL=... python -m benchmarks.bench_ingest --channels 8 --videos 500 --days 30
+    BENCH_DATABASE_URL=... python -m benchmarks.bench_ingest --http --channels 1000 --error-rate 0.01
+"""
+import argparse
+import json
+import os
+import time
+from benchmarks.common import BENCH_ENV, bench_db, truncate
+from benchmarks.fake_api import Faults, FakeYouTubeServer
+from benchmarks.synthetic import FakeAnalytics, FakeYouTube, Scale, channel_ids
+
+
+def run(scale: Scale, workers: int = 4, latency: float = 0.0, http: bool = False,
+        faults: Faults | None = None) -> dict:
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    db = bench_db()
+    if db is None:
+        raise RuntimeError("set BENCH_DATABASE_URL to a scratch database to run ingest benchmarks")
+    if http:
+        faults = faults or Faults(latency=latency)
+        with FakeYouTubeServer(scale, faults) as server:
+            from src import auth
+            auth.FAKE_API_URL = server.url
+            auth.forget_public_youtube()
+            return _run(db, scale, workers, None, None, server)
+    return _run(db, scale, workers, FakeYouTube(scale, latency), FakeAnalytics(scale, latency))
+
+def _run(db, scale: Scale, workers: int, yt, analytics, server: FakeYouTubeServer | None = None) -> dict:
+    from src import main
+    if yt is not None:
+        main.get_public_youtube = lambda: yt
+        main.get_oauth_services = lambda _cid: (None, analytics)
+
+    db.ensure_partitions(scale.start, scale.end)
+    truncate(db, db.channels, db.videos, db.catalog_scans, db.channel_daily_stats, db.video_daily_stats)
+    cids = channel_ids(scale)
+
+    results = {}
+    for label in ("cold", "warm"):
+        if yt is not None:
+            yt.calls = analytics.calls = 0
+        t0 = time.perf_counter()
+        failures, written = main.ingest_all(
+            cids, workers=workers, start=scale.start, end=scale.end, refresh_days=0,
+        )
+        elapsed = time.perf_counter() - t0
+        if failures:
+            raise RuntimeError(f"ingest failed for {failures[0][0]}:\n{failures[0][1]}")
+        rows = sum(sum(counts) for counts in written.values())
+        results[f"ingest.{label}"] = {
+            "seconds": round(elapsed, 6),
+            "rows": rows,
+            "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else None,
+            "channels_per_s": round(len(cids) / elapsed, 2) if elapsed > 0 else None,
+            "written": written,
+        }
+        if yt is not None:
+            results[f"ingest.{label}"].update(data_api_calls=yt.calls, analytics_calls=analytics.calls)
+        if server is not None:
+            results[f"ingest.{label}"]["http"] = server.snapshot_stats(reset=True)
+    return results
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="End-to-end ingest with fake API clients.")
+    p.add_argument("--channels", type=int, default=8)
+    p.add_argument("--videos", type=int, default=500)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fake API call.")
+    p.add_argument("--http", action="store_true", help="Go through the fake HTTP server and the real clients.")
+    p.add_argument("--error-rate", type=float, default=0.0, help="--http: share of calls answered 5xx.")
+    p.add_argument("--throttle-rate", type=float, default=0.0, help="--http: share of calls answered 403/429.")
+    args = p.parse_args()
+    scale = Scale(channels=args.channels, videos=args.videos, days=args.days)
+    faults = Faults(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+    print(json.dumps(run(scale, args.workers, args.latency, args.http, faults), indent=1))
+
+
+if __name__ == "__main__":
+    main()
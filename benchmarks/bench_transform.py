@@ -0,0 +1,115 @@
+"""
+Transform throughput: channel/video metadata and the Analytics reports, row-wise
+and columnar, on synthetic payloads. Checks that the columnar path produces the
+same rows as the per-row transform it replaced before timing anything.
+
+    python -m benchmarks.bench_transform --videos 2000 --days 30
+"""
+import argparse
+import json
+from dataclasses import replace
+from datetime import date
+from benchmarks.common import timed
+from benchmarks.synthetic import (
+    Scale, channel_ids, channel_item, channel_report, video_ids, video_item, video_report,
+)
+from src.columnar import channel_daily_columns, many_video_daily_columns, to_rows
+from src.transform import (
+    transform_channel_item,
+    transform_video_items,
+    transform_channel_daily_response,
+    transform_many_video_daily,
+)
+
+
+# The per-row transform this repo used before src/columnar.py (reference for parity).
+def legacy_many_video_daily(responses):
+    out = []
+    for resp in responses:
+        if not resp or not resp.get("rows"):
+            continue
+        idx_map = {h["name"]: i for i, h in enumerate(resp.get("columnHeaders", []))}
+        video_idx = idx_map.get("video")
+        if video_idx is None:
+            continue
+        for raw_row in resp["rows"]:
+            def _get_int(name):
+                idx = idx_map.get(name)
+                if idx is None:
+                    return 0
+                try:
+                    return int(raw_row[idx])
+                except (TypeError, ValueError):
+                    return 0
+
+            def _get_float(name):
+                idx = idx_map.get(name)
+                if idx is None:
+                    return 0.0
+                try:
+                    return float(raw_row[idx])
+                except (TypeError, ValueError):
+                    return 0.0
+
+            day = raw_row[idx_map.get("day", 0)]
+            try:
+                day_d = date.fromisoformat(day) if day else None
+            except ValueError:
+                day_d = None
+            out.append({
+                "video_id": raw_row[video_idx],
+                "date": day_d,
+                "views": _get_int("views"),
+                "likes": _get_int("likes"),
+                "comments": _get_int("comments"),
+                "shares": _get_int("shares"),
+                "watch_time": _get_float("estimatedMinutesWatched"),
+                "avg_view_duration": _get_float("averageViewDuration"),
+                "avg_view_percent": _get_float("averageViewPercentage"),
+            })
+    return out
+
+
+# One report row in N gets junk values, so the parity check covers the fallbacks
+JUNK_EVERY = 499
+
+
+def run(scale: Scale, repeat: int = 3) -> dict:
+    scale = replace(scale, junk_every=scale.junk_every or JUNK_EVERY)
+    cids = channel_ids(scale)
+    cid = cids[0]
+    vids = video_ids(scale, cid)
+    ch_items = [channel_item(scale, c) for c in cids]
+    v_items = [video_item(scale, v, cid) for v in vids]
+    ch_report = channel_report(scale, cid, scale.start, scale.end)
+    v_pages = [video_report(scale, vids, scale.start, scale.end)]
+    n_daily = len(v_pages[0]["rows"])
+
+    expected = legacy_many_video_daily(v_pages)
+    assert transform_many_video_daily(v_pages) == expected, "dict wrapper differs from legacy rows"
+    assert to_rows(many_video_daily_columns(v_pages)) == expected, "columns differ from legacy rows"
+
+    return {
+        "transform.channel_item": timed(lambda: [transform_channel_item(i) for i in ch_items], len(ch_items), repeat),
+        "transform.video_items": timed(lambda: transform_video_items(v_items), len(v_items), repeat),
+        "transform.channel_daily.rows": timed(
+            lambda: transform_channel_daily_response(ch_report, cid), scale.days, repeat),
+        "transform.channel_daily.columns": timed(
+            lambda: channel_daily_columns(ch_report, cid), scale.days, repeat),
+        "transform.video_daily.legacy_rows": timed(lambda: legacy_many_video_daily(v_pages), n_daily, repeat),
+        "transform.video_daily.rows": timed(lambda: transform_many_video_daily(v_pages), n_daily, repeat),
+        "transform.video_daily.columns": timed(lambda: many_video_daily_columns(v_pages), n_daily, repeat),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Transform throughput on synthetic payloads.")
+    p.add_argument("--videos", type=int, default=2000)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+    print(json.dumps(run(Scale(channels=1, videos=args.videos, days=args.days), args.repeat), indent=1))
+
+
+if __name__ == "__main__":
+    main()
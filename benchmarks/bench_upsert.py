@@ -0,0 +1,64 @@
+"""
+Upsert throughput against a scratch Postgres (BENCH_DATABASE_URL): videos through
+_upsert (insert, then an unchanged re-run the content hash skips), and
+video_daily_stats through INSERT ... VALUES, COPY from row dicts and COPY from
+columns. Every target table is truncated first.
+
+    BENCH_DATABASE_URL=postgresql+psycopg2://localhost/bench python -m benchmarks.bench_upsert
+"""
+import argparse
+import json
+from benchmarks.common import bench_db, timed, truncate
+from benchmarks.synthetic import Scale, channel_ids, video_ids, video_item, video_report
+from src.columnar import many_video_daily_columns, to_rows
+from src.transform import transform_video_items
+
+
+def run(scale: Scale, repeat: int = 3) -> dict:
+    db = bench_db()
+    if db is None:
+        raise RuntimeError("set BENCH_DATABASE_URL to a scratch database to run upsert benchmarks")
+    db.ensure_partitions(scale.start, scale.end)
+
+    cid = channel_ids(scale)[0]
+    vids = video_ids(scale, cid)
+    video_rows = transform_video_items([video_item(scale, v, cid) for v in vids])
+    cols = many_video_daily_columns([video_report(scale, vids, scale.start, scale.end)])
+    daily_rows = to_rows(cols)
+    n = len(daily_rows)
+
+    def _empty(*tables):
+        return lambda: truncate(db, *tables)
+
+    results = {
+        "upsert.videos.insert": timed(lambda: db.upsert_videos(video_rows), len(video_rows), repeat,
+                                      setup=_empty(db.videos)),
+        "upsert.videos.unchanged": timed(lambda: db.upsert_videos(video_rows), len(video_rows), repeat),
+        "upsert.video_daily.values": timed(
+            lambda: db._upsert(db.video_daily_stats, daily_rows, ["video_id", "date"]), n, repeat,
+            setup=_empty(db.video_daily_stats)),
+        "upsert.video_daily.copy_rows": timed(
+            lambda: db._bulk_load(db.video_daily_stats, daily_rows, ["video_id", "date"]), n, repeat,
+            setup=_empty(db.video_daily_stats)),
+        "upsert.video_daily.copy_columns": timed(
+            lambda: db._upsert_columns(db.video_daily_stats, cols, ["video_id", "date"]), n, repeat,
+            setup=_empty(db.video_daily_stats)),
+        # Re-upserting identical rows: the IS DISTINCT FROM guard skips every write
+        "upsert.video_daily.copy_unchanged": timed(
+            lambda: db.upsert_video_daily_columns(cols), n, repeat),
+    }
+    truncate(db, db.videos, db.video_daily_stats)
+    return results
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Upsert throughput against BENCH_DATABASE_URL.")
+    p.add_argument("--videos", type=int, default=2000)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+    print(json.dumps(run(Scale(channels=1, videos=args.videos, days=args.days), args.repeat), indent=1))
+
+
+if __name__ == "__main__":
+    main()
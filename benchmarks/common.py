@@ -0,0 +1,48 @@
+import os
+import time
+from typing import Callable
+
+# Environment for benchmarks that touch the pipeline: no throttling, no cache.
+BENCH_ENV = {
+    "YT_DATA_QPS": "0",
+    "YT_ANALYTICS_QPS": "0",
+    "YT_CREDENTIAL_QPS": "0",
+    "YT_CACHE_MODE": "off",
+}
+
+"""
+Best-of-`repeat` wall time of fn() as a result entry; `rows` (if given) adds a
+throughput figure. setup() runs untimed before every repetition.
+"""
+def timed(fn: Callable, rows: int | None = None, repeat: int = 3, setup: Callable | None = None) -> dict:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    out = {"seconds": round(best, 6)}
+    if rows is not None:
+        out["rows"] = rows
+        out["rows_per_s"] = round(rows / best, 1) if best > 0 else None
+    return out
+
+"""
+src.db pointed at the scratch database in BENCH_DATABASE_URL, or None if unset.
+Benchmarks truncate the tables they write to; never point this at real data.
+"""
+def bench_db():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        return None
+    from sqlalchemy import create_engine
+    from src import db
+    db.set_engine(create_engine(url, pool_size=8, future=True))
+    db.create_tables()
+    return db
+
+def truncate(db, *tables) -> None:
+    from sqlalchemy import text
+    with db.transaction() as conn:
+        conn.execute(text("TRUNCATE " + ", ".join(f'"{t.name}"' for t in tables)))
@@ -0,0 +1,194 @@
+"""
+Local stand-in for the YouTube Data v3 and YouTube Analytics v2 endpoints that
+src/fetch.py calls (channels.list, playlistItems.list, videos.list,
+reports.query), serving synthetic data (benchmarks/synthetic.py) with real
+pagination and configurable latency, 5xx, throttling and quota errors.
+
+    python -m benchmarks.fake_api --port 8085 --videos 500 --latency 0.05 --error-rate 0.01
+    YT_FAKE_API_URL=http://127.0.0.1:8085/ python -m src.main ...
+
+With YT_FAKE_API_URL set, src/auth.py points every client at the server and
+skips the API key and OAuth tokens. GET /_stats returns call counters as JSON.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from benchmarks.synthetic import Scale, respond
+
+# Last path segment -> (API, endpoint)
+ROUTES = {
+    "channels": ("youtube", "channels.list"),
+    "playlistItems": ("youtube", "playlistItems.list"),
+    "videos": ("youtube", "videos.list"),
+    "reports": ("youtubeAnalytics", "reports.query"),
+}
+
+
+@dataclass
+class Faults:
+    latency: float = 0.0         # seconds added to every call
+    jitter: float = 0.0          # +/- uniform seconds on top of latency
+    error_rate: float = 0.0      # share of calls answered 500/503
+    throttle_rate: float = 0.0   # share of calls answered 403 rateLimitExceeded / 429
+    retry_after: float | None = None   # Retry-After seconds sent with throttles
+    quota: int = 0               # calls per API before 403 quotaExceeded (0 = unlimited)
+    seed: int = 0
+
+
+def _error(code: int, reason: str, message: str) -> dict:
+    domain = "youtube.quota" if reason == "quotaExceeded" else "global"
+    return {"error": {"code": code, "message": message,
+                      "errors": [{"reason": reason, "domain": domain, "message": message}]}}
+
+
+class FakeYouTubeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, scale: Scale, faults: Faults | None = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.scale = scale
+        self.faults = faults or Faults()
+        self._stats: Counter = Counter()
+        self._rnd = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    # Decide this call's fate: (status, error body or None, extra headers)
+    def fault_for(self, api: str) -> tuple[int, dict | None, dict]:
+        f = self.faults
+        with self._lock:
+            self._stats[f"calls.{api}"] += 1
+            roll = self._rnd.random()
+            delay = f.latency + (self._rnd.uniform(-f.jitter, f.jitter) if f.jitter else 0.0)
+            over_quota = f.quota and self._stats[f"calls.{api}"] > f.quota
+        if delay > 0:
+            time.sleep(delay)
+        if over_quota:
+            return 403, _error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota."), {}
+        if roll < f.error_rate:
+            code = 500 if roll < f.error_rate / 2 else 503
+            return code, _error(code, "backendError", "Backend Error"), {}
+        if roll < f.error_rate + f.throttle_rate:
+            headers = {"Retry-After": f"{f.retry_after:g}"} if f.retry_after is not None else {}
+            if roll < f.error_rate + f.throttle_rate / 2:
+                return 429, _error(429, "rateLimitExceeded", "Too many requests"), headers
+            return 403, _error(403, "rateLimitExceeded", "Rate limit exceeded"), headers
+        return 200, None, {}
+
+    def record(self, status: int, endpoint: str) -> None:
+        with self._lock:
+            self._stats[f"status.{status}"] += 1
+            self._stats[f"endpoint.{endpoint}"] += 1
+
+    # Call counters so far; reset=True also zeroes them (e.g. between runs)
+    def snapshot_stats(self, reset: bool = False) -> dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            if reset:
+                self._stats.clear()
+        return stats
+
+    def start(self) -> "FakeYouTubeServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-youtube-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeYouTubeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like googleapis
+    server: FakeYouTubeServer
+
+    def log_message(self, fmt, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        self._handle(parts.path, parts.query)
+
+    # googleapiclient turns GETs with URIs over 2000 chars into POSTs carrying
+    # X-HTTP-Method-Override: GET and the query string as the body
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+        if self.headers.get("X-HTTP-Method-Override", "").upper() != "GET":
+            return self._send(405, _error(405, "methodNotAllowed", "only GET is supported"))
+        parts = urlsplit(self.path)
+        self._handle(parts.path, "&".join(q for q in (parts.query, body) if q))
+
+    def _handle(self, path: str, query: str) -> None:
+        if path == "/_stats":
+            return self._send(200, self.server.snapshot_stats())
+        route = ROUTES.get(path.rstrip("/").rsplit("/", 1)[-1])
+        if route is None:
+            return self._send(404, _error(404, "notFound", f"no such endpoint {path}"))
+        api, endpoint = route
+
+        status, err, headers = self.server.fault_for(api)
+        self.server.record(status, endpoint)
+        if err is not None:
+            return self._send(status, err, headers)
+        try:
+            body = respond(self.server.scale, endpoint, dict(parse_qsl(query)))
+        except (KeyError, ValueError) as e:
+            return self._send(400, _error(400, "badRequest", f"bad parameters: {e}"))
+        self._send(200, body)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Fake YouTube Data/Analytics API server.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8085)
+    p.add_argument("--videos", type=int, default=500, help="Videos per channel.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--jitter", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--throttle-rate", type=float, default=0.0)
+    p.add_argument("--retry-after", type=float, default=None)
+    p.add_argument("--quota", type=int, default=0, help="Calls per API before quotaExceeded (0 = unlimited).")
+    args = p.parse_args()
+
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                    args.retry_after, args.quota, args.seed)
+    server = FakeYouTubeServer(Scale(videos=args.videos, seed=args.seed), faults, args.host, args.port)
+    print(f"Serving fake YouTube API on {server.url} (set YT_FAKE_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
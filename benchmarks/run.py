@@ -0,0 +1,136 @@
+"""
+Run the benchmark suite and store the results as JSON, one file per run, so runs
+on different commits can be compared.
+
+    python -m benchmarks.run                          # import budget and transforms only
+    BENCH_DATABASE_URL=... python -m benchmarks.run --suites transform,upsert,ingest
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Suites that need a database are skipped when BENCH_DATABASE_URL is unset.
+The import suite also fails the run (exit 1) if an entry module goes over its
+import-time budget (benchmarks/bench_import.py).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.synthetic import Scale
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SUITES = ("import", "transform", "upsert", "ingest")
+DB_SUITES = {"upsert", "ingest"}
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _run_suite(name: str, scale: Scale, args) -> dict:
+    if name == "import":
+        from benchmarks import bench_import
+        return bench_import.run(args.repeat)
+    if name == "transform":
+        from benchmarks import bench_transform
+        return bench_transform.run(scale, args.repeat)
+    if name == "upsert":
+        from benchmarks import bench_upsert
+        return bench_upsert.run(scale, args.repeat)
+    from benchmarks import bench_ingest
+    return bench_ingest.run(scale, args.workers, args.latency)
+
+"""
+Print each shared timing as new/old ratio of seconds (< 1.0 is faster).
+Returns the metric names that regressed by more than `tolerance`.
+"""
+def compare(new: dict, old: dict, tolerance: float = 0.10) -> list[str]:
+    if new["meta"].get("scale") != old["meta"].get("scale"):
+        print(f"  note: scales differ ({old['meta'].get('scale')} vs {new['meta'].get('scale')}); ratios are not comparable")
+    regressed = []
+    for name, res in sorted(new["results"].items()):
+        prev = old["results"].get(name)
+        if not prev or not prev.get("seconds"):
+            continue
+        ratio = res["seconds"] / prev["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"  {name:<36} {prev['seconds']:10.4f}s -> {res['seconds']:10.4f}s  x{ratio:5.2f}{flag}")
+    return regressed
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Offline benchmark suite.")
+    p.add_argument("--suites", default="import,transform,upsert,ingest",
+                   help=f"Comma-separated subset of {','.join(SUITES)}.")
+    p.add_argument("--channels", type=int, default=4)
+    p.add_argument("--videos", type=int, default=500, help="Videos per channel.")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--workers", type=int, default=4, help="ingest suite: concurrent channels.")
+    p.add_argument("--latency", type=float, default=0.0, help="ingest suite: seconds per fake API call.")
+    p.add_argument("--out", type=Path, default=RESULTS_DIR, help="Directory for the results file.")
+    p.add_argument("--compare", type=Path, default=None, help="Earlier results file to compare against.")
+    args = p.parse_args()
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        p.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    scale = Scale(channels=args.channels, videos=args.videos, days=args.days)
+
+    results: dict = {}
+    skipped = []
+    for name in suites:
+        if name in DB_SUITES and not os.getenv("BENCH_DATABASE_URL"):
+            skipped.append(name)
+            continue
+        print(f"Running {name} ...", flush=True)
+        results.update(_run_suite(name, scale, args))
+    if skipped:
+        print(f"Skipped {', '.join(skipped)} (BENCH_DATABASE_URL not set)")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": asdict(scale),
+            "suites": [s for s in suites if s not in skipped],
+        },
+        "results": results,
+    }
+    args.out.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = args.out / f"{stamp}-{report['meta']['git_rev'] or 'nogit'}.json"
+    path.write_text(json.dumps(report, indent=1, sort_keys=True, default=str))
+
+    for name, res in sorted(results.items()):
+        rate = f"  {res['rows_per_s']:>12,.0f} rows/s" if res.get("rows_per_s") else ""
+        print(f"  {name:<36} {res['seconds']:10.4f}s{rate}")
+    print(f"Results written to {path}")
+
+    failed = False
+    over = [name for name, res in sorted(results.items()) if res.get("over_budget")]
+    if over:
+        print(f"Over import budget: {', '.join(over)}")
+        failed = True
+    if args.compare:
+        print(f"\nAgainst {args.compare}:")
+        failed = bool(compare(report, json.loads(args.compare.read_text()))) or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
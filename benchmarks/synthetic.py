@@ -0,0 +1,233 @@
+"""
+Synthetic YouTube Data / Analytics API payloads, shaped like the real responses
+src/fetch.py receives, at a configurable scale (channels x videos x days), and
+fake API clients serving them. Everything is derived from a seed, so two runs
+at the same scale see identical data.
+"""
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+START_DATE = date(2024, 1, 1)
+
+CHANNEL_REPORT_METRICS = ["views", "subscribersGained", "subscribersLost", "estimatedMinutesWatched"]
+VIDEO_REPORT_METRICS = ["views", "likes", "comments", "shares",
+                        "averageViewDuration", "averageViewPercentage", "estimatedMinutesWatched"]
+
+_WORDS = ("review unboxing tutorial vlog live highlights reaction guide best worst new "
+          "how why top budget pro setup update part final episode shorts").split()
+
+
+@dataclass(frozen=True)
+class Scale:
+    channels: int = 4
+    videos: int = 500        # per channel
+    days: int = 30
+    seed: int = 0
+    null_every: int = 997    # about one analytics row in N carries a null metric (0 = never)
+    # About one video report row in N carries junk: "n/a" / "" metrics or a partial
+    # date ("2024-01"). Off by default, since a row without a date cannot be stored;
+    # bench_transform turns it on for its parity check.
+    junk_every: int = 0
+
+    @property
+    def start(self) -> date:
+        return START_DATE
+
+    @property
+    def end(self) -> date:
+        return START_DATE + timedelta(days=self.days - 1)
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(hashlib.sha1(repr(parts).encode()).digest())
+
+def channel_ids(scale: Scale) -> list[str]:
+    return [f"UCbench{scale.seed:03d}{i:011d}" for i in range(scale.channels)]
+
+def uploads_playlist(channel_id: str) -> str:
+    return "UU" + channel_id[2:]
+
+# Newest first, as the uploads playlist returns them. IDs embed their channel,
+# so any channel ID (synthetic or real) gets a consistent catalog.
+def video_ids(scale: Scale, channel_id: str) -> list[str]:
+    return [f"{channel_id}-v{i:05d}" for i in range(scale.videos - 1, -1, -1)]
+
+def channel_of_video(video_id: str) -> str:
+    return video_id.rsplit("-v", 1)[0]
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _title(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(words)).capitalize()
+
+
+def channel_item(scale: Scale, channel_id: str) -> dict:
+    rnd = _rng(scale.seed, "channel", channel_id)
+    return {
+        "kind": "youtube#channel",
+        "id": channel_id,
+        "snippet": {
+            "title": _title(rnd, 3),
+            "description": _title(rnd, 30),
+            "publishedAt": _iso(datetime(2012, 1, 1, tzinfo=timezone.utc) + timedelta(days=rnd.randint(0, 3000))),
+        },
+        "statistics": {
+            "viewCount": str(rnd.randint(10**4, 10**9)),
+            "subscriberCount": str(rnd.randint(100, 10**7)),
+            "videoCount": str(scale.videos),
+        },
+        "contentDetails": {"relatedPlaylists": {"uploads": uploads_playlist(channel_id)}},
+    }
+
+def video_item(scale: Scale, video_id: str, channel_id: str | None = None) -> dict:
+    rnd = _rng(scale.seed, "video", video_id)
+    thumbs = {k: {"url": f"https://i.ytimg.com/vi/{video_id}/{k}.jpg"} for k in ("default", "medium", "high")}
+    if rnd.random() < 0.7:
+        thumbs["maxres"] = {"url": f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"}
+    return {
+        "kind": "youtube#video",
+        "id": video_id,
+        "snippet": {
+            "channelId": channel_id or channel_of_video(video_id),
+            "title": _title(rnd, rnd.randint(3, 10)),
+            "description": _title(rnd, rnd.randint(10, 120)),
+            "tags": [rnd.choice(_WORDS) for _ in range(rnd.randint(0, 12))],
+            "publishedAt": _iso(datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rnd.randint(0, 2_000_000))),
+            "thumbnails": thumbs,
+        },
+        "statistics": {
+            "viewCount": str(rnd.randint(0, 10**7)),
+            "likeCount": str(rnd.randint(0, 10**5)),
+            "commentCount": str(rnd.randint(0, 10**4)),
+        },
+    }
+
+def _days(start: date, end: date) -> list[str]:
+    return [(start + timedelta(days=d)).isoformat() for d in range((end - start).days + 1)]
+
+def channel_report(scale: Scale, channel_id: str, start: date, end: date) -> dict:
+    rnd = _rng(scale.seed, "chreport", channel_id, start, end)
+    rows = [[day, rnd.randint(0, 10**6), rnd.randint(0, 5000), rnd.randint(0, 500), rnd.uniform(0, 10**6)]
+            for day in _days(start, end)]
+    return {
+        "kind": "youtubeAnalytics#resultTable",
+        "columnHeaders": [{"name": n, "columnType": "DIMENSION" if n == "day" else "METRIC"}
+                          for n in ["day"] + CHANNEL_REPORT_METRICS],
+        "rows": rows,
+    }
+
+"""
+One page of a dimensions=video,day report (rows sorted by day, then video), as
+fetch_many_video_daily_analytics requests it. start_index is 1-based.
+"""
+def video_report(scale: Scale, ids: list[str], start: date, end: date,
+                 start_index: int = 1, max_results: int | None = None) -> dict:
+    days = _days(start, end)
+    total = len(days) * len(ids)
+    first = start_index - 1
+    last = total if max_results is None else min(total, first + max_results)
+    rows = []
+    for pos in range(first, last):
+        day, vid = days[pos // len(ids)], ids[pos % len(ids)]
+        rnd = _rng(scale.seed, "vreport", vid, day)
+        views = rnd.randint(0, 10**5)
+        row = [vid, day, views, rnd.randint(0, views // 10 + 1), rnd.randint(0, 200), rnd.randint(0, 50),
+               rnd.uniform(5, 900), rnd.uniform(1, 100), views * rnd.uniform(0.1, 8)]
+        if scale.null_every and rnd.randrange(scale.null_every) == 0:
+            row[3] = None
+        if scale.junk_every and rnd.randrange(scale.junk_every) == 0:
+            kind = rnd.randrange(3)
+            if kind == 0:
+                row[8] = "n/a"
+            elif kind == 1:
+                row[5] = ""
+            else:
+                row[1] = day[:7]
+        rows.append(row)
+    return {
+        "kind": "youtubeAnalytics#resultTable",
+        "columnHeaders": [{"name": n, "columnType": "DIMENSION" if n in ("video", "day") else "METRIC"}
+                          for n in ["video", "day"] + VIDEO_REPORT_METRICS],
+        "rows": rows,
+    }
+
+
+"""
+The response to one API call, given its endpoint ("channels.list",
+"playlistItems.list", "videos.list" or "reports.query") and its query
+parameters as src/fetch.py sends them. Shared by the in-process fake clients
+below and the HTTP stand-in in benchmarks/fake_api.py.
+"""
+def respond(scale: Scale, endpoint: str, params: dict) -> dict:
+    if endpoint == "channels.list":
+        return {"items": [channel_item(scale, c) for c in params["id"].split(",")]}
+    if endpoint == "playlistItems.list":
+        ids = video_ids(scale, "UC" + params["playlistId"][2:])
+        size = int(params.get("maxResults") or 50)
+        at = int(params.get("pageToken") or 0)
+        resp = {"items": [{"contentDetails": {"videoId": v}} for v in ids[at:at + size]]}
+        if at + size < len(ids):
+            resp["nextPageToken"] = str(at + size)
+        return resp
+    if endpoint == "videos.list":
+        return {"items": [video_item(scale, v) for v in params["id"].split(",")]}
+    if endpoint == "reports.query":
+        start = date.fromisoformat(params["startDate"])
+        end = date.fromisoformat(params["endDate"])
+        if params["dimensions"] == "day":
+            return channel_report(scale, params["ids"].split("==", 1)[1], start, end)
+        vids = params["filters"].split("==", 1)[1].split(",")
+        max_results = params.get("maxResults")
+        return video_report(scale, vids, start, end, int(params.get("startIndex") or 1),
+                            int(max_results) if max_results else None)
+    raise KeyError(f"unknown endpoint {endpoint}")
+
+
+# Fake clients: the subset of the googleapiclient surface src/fetch.py uses.
+# Requests have no `uri`, so src/cache.py never caches them.
+class _Request:
+    def __init__(self, fn, latency: float):
+        self._fn = fn
+        self._latency = latency
+
+    def execute(self) -> dict:
+        if self._latency:
+            time.sleep(self._latency)
+        return self._fn()
+
+class _Resource:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+class _FakeClient:
+    def __init__(self, scale: Scale, latency: float = 0.0):
+        self.scale = scale
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _method(self, endpoint: str):
+        def call(**params) -> _Request:
+            with self._lock:
+                self.calls += 1
+            return _Request(lambda: respond(self.scale, endpoint, params), self.latency)
+        return call
+
+class FakeYouTube(_FakeClient):
+    def channels(self):
+        return _Resource(list=self._method("channels.list"))
+
+    def playlistItems(self):
+        return _Resource(list=self._method("playlistItems.list"))
+
+    def videos(self):
+        return _Resource(list=self._method("videos.list"))
+
+class FakeAnalytics(_FakeClient):
+    def reports(self):
+        return _Resource(query=self._method("reports.query"))
@@ -1,12 +1,17 @@
 import os
+import hashlib
+import json
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 from dotenv import load_dotenv
 from google.auth.exceptions import RefreshError
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from src import cache, metrics
+from src.transport import authorized_http, shared_http
 
 load_dotenv()
 
@@ -18,28 +23,82 @@ SCOPES = [
 PROJECT_ROOT = Path(__file__).parent.parent
 CLIENT_SECRET = PROJECT_ROOT / "client_secret.json"
 
+# Created when the first token is written
 TOKENS_DIR = Path(os.getenv("YT_TOKENS_DIR", PROJECT_ROOT / "tokens"))
-TOKENS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Channel -> fingerprint of the token already verified to belong to it
+BINDINGS_FILE = TOKENS_DIR / "bindings.json"
+
+# Tokens expiring within this many seconds are refreshed before they are used
+REFRESH_MARGIN = timedelta(seconds=int(os.getenv("YT_TOKEN_REFRESH_MARGIN", "600")))
+REFRESH_WORKERS = int(os.getenv("YT_TOKEN_REFRESH_WORKERS", "8"))
 
 OPEN_BROWSER = str(os.getenv("OAUTH_OPEN_BROWSER", "1")).lower() not in ("0", "false")
 
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+# Base URL of a stand-in API server (benchmarks/fake_api.py). When set, every
+# client is pointed at it and no API key or OAuth token is used.
+FAKE_API_URL = os.getenv("YT_FAKE_API_URL")
+
+# Client factory
+# Discovery documents come from the static copies bundled with googleapiclient and
+# are parsed once per process; every client below is built from the parsed doc.
+# googleapiclient.discovery, google_auth_oauthlib and google.auth's requests
+# transport are imported on first use: they dominate import time, and most
+# entry points (and every transform-only caller) never need them.
+@lru_cache(maxsize=None)
+def _discovery_doc(service: str, version: str) -> dict:
+    from googleapiclient.discovery_cache import get_static_doc
+    doc = get_static_doc(service, version)
+    if doc is None:
+        raise RuntimeError(f"No bundled discovery document for {service} {version}")
+    return json.loads(doc)
+
+# build_from_document fixes up method parameters in place on the shared doc
+_BUILD_LOCK = threading.Lock()
+
+def _build(service: str, version: str, **kwargs):
+    from googleapiclient.discovery import build_from_document
+    if FAKE_API_URL:
+        kwargs["client_options"] = {"api_endpoint": FAKE_API_URL}
+    doc = _discovery_doc(service, version)
+    with _BUILD_LOCK:
+        return build_from_document(doc, **kwargs)
+
+# One public client for the whole run; its pooled transport is thread-safe.
+_public_youtube = None
+_public_lock = threading.Lock()
+
 def get_public_youtube():
-    if not API_KEY:
-        raise RuntimeError("YOUTUBE_API_KEY not set in your .env")
-    return build("youtube", "v3", developerKey=API_KEY)
+    global _public_youtube
+    with _public_lock:
+        if _public_youtube is None:
+            if not API_KEY and not (cache.replaying() or FAKE_API_URL):
+                raise RuntimeError("YOUTUBE_API_KEY not set in your .env")
+            _public_youtube = _build("youtube", "v3", developerKey=API_KEY, http=shared_http())
+        return _public_youtube
+
+# Drop the public client, so the next get_public_youtube() builds one from the
+# current settings (API_KEY, FAKE_API_URL).
+def forget_public_youtube() -> None:
+    global _public_youtube
+    with _public_lock:
+        _public_youtube = None
 
 def _token_path(channel_id: str) -> Path:
     return TOKENS_DIR / f"{channel_id}.pickle"
 
 def _atomic_write_pickle(obj, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
     with tmp.open("wb") as f:
         pickle.dump(obj, f)
     tmp.replace(path)
 
 def _run_flow():
+    metrics.inc("oauth_flows_total")
+    from google_auth_oauthlib.flow import InstalledAppFlow
     flow = InstalledAppFlow.from_client_secrets_file(str(CLIENT_SECRET), SCOPES)
     # select_account helps you choose the Brand identity; include_granted_scopes is optional
     return flow.run_local_server(
@@ -50,63 +109,251 @@ def _run_flow():
         # authorization_prompt_message and success_message can be customized if desired
     )
 
+class ChannelMismatchError(RuntimeError):
+    """The token authorizes a different channel than the one it is stored for."""
+
 def _verify_token_matches_channel(creds, expected_channel_id: str) -> None:
-    yt = build("youtube", "v3", credentials=creds)
+    metrics.inc("oauth_verifications_total")
+    yt = _build("youtube", "v3", http=authorized_http(creds))
     resp = yt.channels().list(part="id", mine=True, maxResults=50).execute()
     mine_ids: List[str] = [it["id"] for it in resp.get("items", [])]
     if expected_channel_id not in mine_ids:
-        raise RuntimeError(
+        raise ChannelMismatchError(
             f"Authorized channel(s) {mine_ids} do not include {expected_channel_id}. "
             "When the Google chooser opens, pick the Brand Account for this channel."
         )
 
+# The refresh token identifies a grant; access tokens rotate on every refresh.
+def _fingerprint(creds) -> str:
+    return hashlib.sha256((creds.refresh_token or creds.token or "").encode()).hexdigest()[:32]
+
+def _expires_soon(creds, margin: timedelta = REFRESH_MARGIN) -> bool:
+    if not creds.valid:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth keeps expiry as naive UTC
+    return creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None) < margin
+
 """
-Ensure a valid token exists for channel_id. If missing/invalid, run OAuth.
-Returns the token file path.
+Process-wide store of per-channel OAuth credentials.
+Each token file is unpickled once; the same Credentials object then backs every
+client built for that channel, so a refresh made anywhere (here, or by
+AuthorizedHttp mid-run) is seen everywhere. Tokens near expiry are refreshed
+ahead of use, one channel at a time per lock, and written back atomically.
+The channel a token was verified against is remembered in BINDINGS_FILE by
+token fingerprint, so the `channels.list mine=true` check runs once per grant
+rather than once per run.
 """
-def ensure_channel_token(channel_id: str, force_reauth: bool = False) -> Path:
-    tp = _token_path(channel_id)
-    creds = None
+class CredentialManager:
+    def __init__(self, tokens_dir: Path = TOKENS_DIR, bindings_file: Path = BINDINGS_FILE):
+        self.tokens_dir = tokens_dir
+        self.bindings_file = bindings_file
+        self._creds: dict[str, object] = {}
+        self._persisted: dict[str, str | None] = {}   # channel -> access token on disk
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._bindings: dict[str, dict] | None = None
+
+    def _channel_lock(self, channel_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(channel_id, threading.Lock())
 
-    if tp.exists() and not force_reauth:
+    # Cached credentials for channel_id, loading the token file once; None if there is none.
+    def load(self, channel_id: str):
+        with self._lock:
+            creds = self._creds.get(channel_id)
+        if creds is not None:
+            return creds
+        tp = _token_path(channel_id)
+        if not tp.exists():
+            return None
         with tp.open("rb") as f:
             creds = pickle.load(f)
+        with self._lock:
+            self._persisted.setdefault(channel_id, creds.token)
+            return self._creds.setdefault(channel_id, creds)
+
+    # Make creds the channel's credentials and write them to its token file.
+    def store(self, channel_id: str, creds) -> None:
+        _atomic_write_pickle(creds, _token_path(channel_id))
+        with self._lock:
+            self._creds[channel_id] = creds
+            self._persisted[channel_id] = creds.token
+
+    # Credentials for channel_id, refreshed first if they expire within the margin.
+    def get(self, channel_id: str):
+        creds = self.load(channel_id)
+        if creds is not None and _expires_soon(creds):
+            self.refresh(channel_id)
+        return creds
 
-    if not creds or not creds.valid:
-        if creds and creds.refresh_token and not force_reauth:
+    """
+    Refresh channel_id's token if it is (about to be) expired, and persist it.
+    Concurrent callers for the same channel wait for one refresh.
+    Raises RefreshError if the grant was revoked or expired.
+    """
+    def refresh(self, channel_id: str, force: bool = False) -> bool:
+        with self._channel_lock(channel_id):
+            creds = self.load(channel_id)
+            if creds is None or not creds.refresh_token:
+                return False
+            if not force and not _expires_soon(creds):
+                return False
+            from google.auth.transport.requests import Request
             try:
-                creds.refresh(Request())
-                _verify_token_matches_channel(creds, channel_id)
+                with metrics.timer("oauth_refresh_seconds"):
+                    creds.refresh(Request())
             except RefreshError:
-                # Refresh token invalid/expired/revoked -> re-consent
-                creds = _run_flow()
-                _verify_token_matches_channel(creds, channel_id)
-                _atomic_write_pickle(creds, tp)
-        else:
-            # No creds or no refresh token -> re-consent
-            creds = _run_flow()
-            _verify_token_matches_channel(creds, channel_id)
-            _atomic_write_pickle(creds, tp)
-    else:
-        # Valid creds
-        try:
-            _verify_token_matches_channel(creds, channel_id)
-        except Exception:
+                metrics.inc("oauth_refresh_total", result="failed")
+                raise
+            metrics.inc("oauth_refresh_total", result="ok")
+            self.store(channel_id, creds)
+            return True
+
+    """
+    Refresh, in parallel, every channel whose token expires within the margin.
+    Returns {channel_id: error message} for the ones that could not be refreshed.
+    """
+    def refresh_due(self, channel_ids: list[str], workers: int = REFRESH_WORKERS) -> dict[str, str]:
+        if cache.replaying() or FAKE_API_URL:
+            return {}   # no token is used
+        due = [cid for cid in channel_ids
+               if (creds := self.load(cid)) is not None and _expires_soon(creds)]
+        failures: dict[str, str] = {}
+        if not due:
+            return failures
+
+        def _one(cid: str) -> tuple[str, str | None]:
+            try:
+                self.refresh(cid)
+                return cid, None
+            except Exception as e:
+                return cid, f"{type(e).__name__}: {e}"
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(due)))) as pool:
+            for cid, err in pool.map(_one, due):
+                if err:
+                    failures[cid] = err
+        return failures
+
+    # Write back tokens refreshed outside this manager (by AuthorizedHttp during requests).
+    def persist_changed(self) -> int:
+        with self._lock:
+            changed = [(cid, c) for cid, c in self._creds.items() if c.token != self._persisted.get(cid)]
+        for cid, creds in changed:
+            with self._channel_lock(cid):
+                self.store(cid, creds)
+        return len(changed)
+
+    def _load_bindings(self) -> dict[str, dict]:
+        if self._bindings is None:
+            try:
+                self._bindings = json.loads(self.bindings_file.read_text())
+            except (OSError, ValueError):
+                self._bindings = {}
+        return self._bindings
+
+    def is_bound(self, channel_id: str, creds) -> bool:
+        with self._lock:
+            entry = self._load_bindings().get(channel_id)
+        return bool(entry) and entry.get("fingerprint") == _fingerprint(creds)
+
+    def bind(self, channel_id: str, creds) -> None:
+        with self._lock:
+            bindings = self._load_bindings()
+            bindings[channel_id] = {
+                "fingerprint": _fingerprint(creds),
+                "verified_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            self.bindings_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.bindings_file.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(bindings, indent=1, sort_keys=True))
+            tmp.replace(self.bindings_file)
+
+    # Check creds authorize channel_id unless this grant was already verified.
+    def verify(self, channel_id: str, creds) -> None:
+        if self.is_bound(channel_id, creds):
+            return
+        _verify_token_matches_channel(creds, channel_id)
+        self.bind(channel_id, creds)
+
+CREDENTIALS = CredentialManager()
+
+"""
+Check channel_id's stored token without user interaction: refresh it if it is
+close to expiry (or always, with force_refresh), save it, and verify it belongs
+to the channel unless that grant was verified before.
+Returns None if the token is usable, else why re-consent is needed.
+Network and API errors are raised, since re-consent would not fix them.
+"""
+def check_channel_token(channel_id: str, force_refresh: bool = False) -> str | None:
+    creds = CREDENTIALS.load(channel_id)
+    if creds is None:
+        return "no token"
+    try:
+        if creds.refresh_token:
+            CREDENTIALS.refresh(channel_id, force=force_refresh)
+        elif not creds.valid:
+            return "token expired and has no refresh token"
+        CREDENTIALS.verify(channel_id, creds)
+    except RefreshError as e:
+        # Refresh token invalid/expired/revoked
+        return f"refresh failed: {e}"
+    except ChannelMismatchError as e:
+        return str(e)
+    return None
+
+# One consent flow at a time: each opens a browser tab, and parallel ingest
+# workers would otherwise prompt for several channels at once.
+_flow_lock = threading.Lock()
+
+"""
+Ensure a valid token exists for channel_id. If missing/invalid, run OAuth.
+A token close to expiry is refreshed and saved; one that cannot be refreshed, or
+that turns out to belong to another channel, is replaced by re-consent.
+Consent flows are serialized across threads; workers that need no consent are
+not held up. Returns the token file path.
+"""
+def ensure_channel_token(channel_id: str, force_reauth: bool = False) -> Path:
+    if force_reauth or check_channel_token(channel_id) is not None:
+        with _flow_lock:
             creds = _run_flow()
             _verify_token_matches_channel(creds, channel_id)
-            _atomic_write_pickle(creds, tp)
+            CREDENTIALS.store(channel_id, creds)
+            CREDENTIALS.bind(channel_id, creds)
+        forget_oauth_services(channel_id)
+    return _token_path(channel_id)
 
-    return tp
+# Authenticated clients per channel, built once per process.
+_oauth_clients: dict[str, tuple] = {}
+_oauth_lock = threading.Lock()
 
-# Load a token for channel_id and return authenticated clients.
+# Authenticated clients for channel_id (memoized), on the managed credentials.
 def get_oauth_services(channel_id: str):
-    tp = _token_path(channel_id)
-    if not tp.exists():
+    with _oauth_lock:
+        cached = _oauth_clients.get(channel_id)
+    if cached:
+        return cached
+
+    # Replay serves every response from the cache, the fake server needs no auth
+    if cache.replaying() or FAKE_API_URL:
+        http = shared_http()
+        return _build("youtube", "v3", http=http), _build("youtubeAnalytics", "v2", http=http)
+
+    creds = CREDENTIALS.get(channel_id)
+    if creds is None:
         ensure_channel_token(channel_id, force_reauth=True)
+        creds = CREDENTIALS.get(channel_id)
 
-    with tp.open("rb") as f:
-        creds = pickle.load(f)
+    # Both clients share one credentialed view of the process-wide connection pool
+    http = authorized_http(creds)
+    youtube = _build("youtube", "v3", http=http)
+    analytics = _build("youtubeAnalytics", "v2", http=http)
+    with _oauth_lock:
+        return _oauth_clients.setdefault(channel_id, (youtube, analytics))
 
-    youtube = build("youtube", "v3", credentials=creds)
-    analytics = build("youtubeAnalytics", "v2", credentials=creds)
-    return youtube, analytics
+# Drop memoized clients for channel_id (its token file changed).
+def forget_oauth_services(channel_id: str) -> None:
+    with _oauth_lock:
+        _oauth_clients.pop(channel_id, None)
@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+from src.config import STATE_DIR
+
+CACHE_DIR = STATE_DIR / "http_cache"
+MAX_BYTES = int(os.getenv("YT_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Seconds a cached response stays fresh, per endpoint (replay ignores these)
+TTLS = {
+    "channels.list": 6 * 3600,
+    "playlistItems.list": 3600,
+    "videos.list": 24 * 3600,
+    "reports.query": 24 * 3600,
+}
+
+"""
+off    - no caching
+record - store every response, never serve from cache
+on     - serve fresh entries, store the rest
+replay - serve every entry regardless of age; a miss raises CacheMiss (no network)
+"""
+MODES = ("off", "record", "on", "replay")
+_mode = os.getenv("YT_CACHE_MODE", "off")
+
+# Error statuses that are answers, not failures (e.g. 404 for a channel with no
+# uploads playlist): stored and replayed like responses. Throttling, quota and
+# server errors are never cached.
+CACHED_ERROR_STATUSES = {400, 404}
+
+# Query parameters that identify the caller, not the data
+_IGNORED_PARAMS = {"key", "access_token", "quotaUser"}
+
+
+class CacheMiss(LookupError):
+    """Replay mode needed a response that was never cached."""
+
+
+def set_mode(mode: str) -> None:
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"cache mode must be one of {MODES}, got {mode!r}")
+    _mode = mode
+
+def get_mode() -> str:
+    return _mode
+
+def replaying() -> bool:
+    return _mode == "replay"
+
+
+"""
+Content address of a request: endpoint plus its sorted query parameters (minus
+credentials) and body. Returns None for requests without a URI (e.g. fakes).
+Take it before request.execute(): a GET whose URI is over 2048 characters is
+sent as a POST, with the query moved into the body, and would key differently.
+"""
+def request_key(api: str, endpoint: str, request) -> str | None:
+    uri = getattr(request, "uri", None)
+    if not uri:
+        return None
+    params = sorted((k, v) for k, v in parse_qsl(urlsplit(uri).query) if k not in _IGNORED_PARAMS)
+    raw = json.dumps([api, endpoint, params, getattr(request, "body", None)], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _path(key: str):
+    return CACHE_DIR / key[:2] / f"{key}.json.gz"
+
+
+_lock = threading.Lock()
+_total_bytes: int | None = None   # lazily measured on first store
+
+# Cached response for key (from request_key); uri is for messages only.
+def lookup(api: str, endpoint: str, key: str | None, uri: str | None = None) -> dict | None:
+    if _mode in ("off", "record"):
+        return None
+    path = _path(key) if key else None
+    if path is None or not path.exists():
+        if replaying():
+            raise CacheMiss(f"no cached response for {api} {endpoint} ({uri or '?'})")
+        return None
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        entry = json.load(f)
+    if not replaying() and time.time() - entry["stored_at"] > TTLS.get(endpoint, 3600):
+        return None
+    os.utime(path)  # mtime doubles as last-access time for LRU eviction
+    if "error" in entry:
+        raise _replayed_error(entry["error"], uri)
+    return entry["response"]
+
+def _replayed_error(error: dict, uri: str | None):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    resp = httplib2.Response({"status": str(error["status"]), "content-type": "application/json"})
+    return HttpError(resp, error["content"].encode("utf-8"), uri=uri)
+
+def store(api: str, endpoint: str, key: str | None, response: dict) -> None:
+    _write(api, endpoint, key, {"response": response})
+
+# Store an HttpError in CACHED_ERROR_STATUSES so lookup() raises it again.
+def store_error(api: str, endpoint: str, key: str | None, error) -> None:
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status not in CACHED_ERROR_STATUSES:
+        return
+    content = error.content.decode("utf-8", "replace") if isinstance(error.content, bytes) else str(error.content)
+    _write(api, endpoint, key, {"error": {"status": status, "content": content}})
+
+def _write(api: str, endpoint: str, key: str | None, payload: dict) -> None:
+    if _mode in ("off", "replay") or not key:
+        return
+    path = _path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({"stored_at": time.time(), "api": api, "endpoint": endpoint, **payload}, f)
+    size = tmp.stat().st_size
+    old = path.stat().st_size if path.exists() else 0
+    tmp.replace(path)
+    _account(size - old)
+
+def _files():
+    return list(CACHE_DIR.glob("*/*.json.gz"))
+
+def _account(delta: int) -> None:
+    global _total_bytes
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = sum(p.stat().st_size for p in _files())
+        else:
+            _total_bytes += delta
+        if _total_bytes > MAX_BYTES:
+            _total_bytes = _evict(int(MAX_BYTES * 0.9))
+
+# Delete least recently used entries until the cache is at most `target` bytes.
+def _evict(target: int) -> int:
+    entries = []
+    for p in _files():
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    entries.sort()
+    total = sum(size for _m, size, _p in entries)
+    for _mtime, size, p in entries:
+        if total <= target:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+    return total
@@ -0,0 +1,173 @@
+from datetime import date
+from typing import Callable, Sequence
+import numpy as np
+from src.metrics import timed
+
+"""
+Column-oriented transforms for Analytics API reports.
+A report's `rows` are transposed once and each column is converted with one
+NumPy cast, instead of building a dict (and two closures) per row. The result is
+a Columns mapping, table column name -> 1-D array, all of equal length, in the
+column order of the target table; db.upsert_*_columns loads it directly.
+"""
+Columns = dict[str, np.ndarray]
+
+DATE = "datetime64[D]"
+
+
+# Converters: one raw report column -> typed array.
+# Non-numeric / missing values become 0, matching int(x) / float(x) with a 0 fallback.
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _to_date(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+# np.fromiter applies int()/float() per value in C; anything it rejects (None,
+# junk strings) sends the column through the per-value fallback instead.
+def _ints(values: Sequence) -> np.ndarray:
+    try:
+        return np.fromiter(values, np.int64, len(values))
+    except (TypeError, ValueError, OverflowError):
+        return np.fromiter((_to_int(v) for v in values), np.int64, len(values))
+
+def _floats(values: Sequence) -> np.ndarray:
+    try:
+        arr = np.fromiter(values, np.float64, len(values))
+        if not np.isnan(arr).any():   # fromiter turns None into NaN; float(None) is our 0.0
+            return arr
+    except (TypeError, ValueError):
+        pass
+    return np.fromiter((_to_float(v) for v in values), np.float64, len(values))
+
+def _is_iso_day(value) -> bool:
+    return (isinstance(value, str) and len(value) == 10 and value[4] == value[7] == "-"
+            and value[:4].isdigit() and value[5:7].isdigit() and value[8:].isdigit())
+
+# ISO dates in one vectorized parse; None/"" become NaT. NumPy also accepts
+# partial and other forms ("2024-01", "today", "NaT") that date.fromisoformat
+# rejects, so NumPy only parses plain YYYY-MM-DD strings. When a column has
+# anything else, each distinct value goes through _to_date once (reports repeat
+# each day many times) and NumPy casts the normalized strings.
+def _dates(values: Sequence) -> np.ndarray:
+    try:
+        distinct = set(values)
+    except TypeError:   # unhashable values
+        return np.array([_to_date(v) for v in values], dtype=DATE)
+    if all(not v or _is_iso_day(v) for v in distinct):
+        try:
+            return np.array(values, dtype=DATE)
+        except ValueError:   # e.g. "2024-02-30"
+            pass
+    iso = {}
+    for v in distinct:
+        d = _to_date(v)
+        iso[v] = d.isoformat() if d else None
+    return np.array([iso[v] for v in values], dtype=DATE)
+
+def _strings(values: Sequence) -> np.ndarray:
+    return np.array(values, dtype=object)
+
+
+# (table column, report column, converter)
+Metric = tuple[str, str, Callable[[Sequence], np.ndarray]]
+
+CHANNEL_DAILY_METRICS: list[Metric] = [
+    ("views", "views", _ints),
+    ("subs_gained", "subscribersGained", _ints),
+    ("subs_lost", "subscribersLost", _ints),
+    ("estimated_minutes_watched", "estimatedMinutesWatched", _floats),
+]
+
+VIDEO_DAILY_METRICS: list[Metric] = [
+    ("views", "views", _ints),
+    ("likes", "likes", _ints),
+    ("comments", "comments", _ints),
+    ("shares", "shares", _ints),
+    ("watch_time", "estimatedMinutesWatched", _floats),
+    ("avg_view_duration", "averageViewDuration", _floats),
+    ("avg_view_percent", "averageViewPercentage", _floats),
+]
+
+def _empty(key: str, metrics: list[Metric]) -> Columns:
+    cols = {key: np.empty(0, dtype=object), "date": np.empty(0, dtype=DATE)}
+    for name, _api, conv in metrics:
+        cols[name] = np.empty(0, dtype=np.int64 if conv is _ints else np.float64)
+    return cols
+
+"""
+Transpose one report into Columns: key column first, then date, then metrics.
+key_value fills the key column with a constant; otherwise it is read from the
+report column named key_source. Metrics missing from the report are all zeros.
+"""
+def _report_columns(resp: dict, key: str, metrics: list[Metric],
+                    key_value: str | None = None, key_source: str | None = None) -> Columns:
+    if not resp or not resp.get("rows"):
+        return _empty(key, metrics)
+    idx_map = {h["name"]: i for i, h in enumerate(resp.get("columnHeaders", []))}
+    if key_value is None and idx_map.get(key_source) is None:
+        return _empty(key, metrics)
+
+    raw = list(zip(*resp["rows"]))
+    n = len(resp["rows"])
+    cols: Columns = {
+        key: np.full(n, key_value, dtype=object) if key_value is not None
+        else _strings(raw[idx_map[key_source]]),
+        "date": _dates(raw[idx_map.get("day", 0)]),
+    }
+    for name, api, conv in metrics:
+        idx = idx_map.get(api)
+        if idx is None:
+            cols[name] = conv([0] * n)
+        else:
+            cols[name] = conv(raw[idx])
+    return cols
+
+# channel_daily_stats columns from a dimensions=day report
+@timed("transform_seconds", stage="transform")
+def channel_daily_columns(resp: dict, channel_id: str) -> Columns:
+    return _report_columns(resp, "channel_id", CHANNEL_DAILY_METRICS, key_value=channel_id)
+
+# video_daily_stats columns from a per-video (dimensions=day) report
+@timed("transform_seconds", stage="transform")
+def video_daily_columns(resp: dict, video_id: str) -> Columns:
+    return _report_columns(resp, "video_id", VIDEO_DAILY_METRICS, key_value=video_id)
+
+# video_daily_stats columns from dimensions=video,day report pages, concatenated
+@timed("transform_seconds", stage="transform")
+def many_video_daily_columns(responses: Sequence[dict]) -> Columns:
+    parts = [_report_columns(r, "video_id", VIDEO_DAILY_METRICS, key_source="video") for r in responses]
+    return concat(parts) if parts else _empty("video_id", VIDEO_DAILY_METRICS)
+
+
+# True for a Columns batch (every value an array), False for row dicts
+def is_columns(batch) -> bool:
+    return isinstance(batch, dict) and all(isinstance(v, np.ndarray) for v in batch.values())
+
+def num_rows(cols: Columns) -> int:
+    return len(next(iter(cols.values()))) if cols else 0
+
+def concat(parts: Sequence[Columns]) -> Columns:
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+# Row dicts (python ints/floats, datetime.date, None for NaT), one per row.
+def to_rows(cols: Columns) -> list[dict]:
+    names = list(cols)
+    values = [cols[n].tolist() for n in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
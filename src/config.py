@@ -1,3 +1,17 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Local run state (quota ledger, ...)
+STATE_DIR = Path(os.getenv("YT_STATE_DIR", PROJECT_ROOT / "state"))
+
+# Channels that are planned first when the daily quota is tight
+PRIORITY_CHANNEL_IDS: list[str] = []
+
 ALL_CHANNEL_IDS = [
     "UCYzCjvqLXI58j4sgSUrPg1g",  # Exotic Earth
     "UCthNWaLc9TihNkkzR7hGGUg",  # Lab Hacks
@@ -1,14 +1,24 @@
+import hashlib
+import io
+import json
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
 from datetime import date, timedelta
-from typing import Sequence
+from typing import NamedTuple, Sequence
+import numpy as np
 from dotenv import load_dotenv
 from sqlalchemy import (
     create_engine, MetaData, Table, Column,
     String, Integer, BigInteger, Float, Date, TIMESTAMP,
-    PrimaryKeyConstraint, select, func
+    PrimaryKeyConstraint, select, func, text, tuple_, literal_column
 )
-from sqlalchemy.pool import NullPool
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src import metrics
+from src.columnar import Columns, num_rows, to_rows
 
 # Environment
 load_dotenv()
@@ -19,16 +29,50 @@ DB_HOST = os.getenv("host")
 DB_PORT = os.getenv("port", "5432")
 DB_NAME = os.getenv("dbname")
 
-if not all([DB_USER, DB_PASS, DB_HOST, DB_NAME]):
-    raise RuntimeError("Missing one of required DB env vars: user/password/host/dbname")
+# Connection pool; size it to at least the number of concurrent ingest workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "4"))
 
-DATABASE_URL = (
-    f"postgresql+psycopg2://{DB_USER}:{DB_PASS}"
-    f"@{DB_HOST}:{DB_PORT}/{DB_NAME}?sslmode=require"
-)
+def database_url() -> str:
+    if not all([DB_USER, DB_PASS, DB_HOST, DB_NAME]):
+        raise RuntimeError("Missing one of required DB env vars: user/password/host/dbname")
+    return (
+        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}"
+        f"@{DB_HOST}:{DB_PORT}/{DB_NAME}?sslmode=require"
+    )
+
+# Created on first use, so importing this module (for the table definitions or
+# the transforms' tests) needs no DB settings and opens nothing
+_engine = None
+_engine_lock = threading.Lock()
+
+# Pooled: connections (and their TLS sessions) are reused across channels for the whole run
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(
+                database_url(),
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                future=True,
+            )
+        return _engine
+
+# Use `engine` instead of the configured database (scratch DBs, benchmarks).
+def set_engine(engine) -> None:
+    global _engine
+    with _engine_lock:
+        _engine = engine
+
+# `db.engine` still works for callers; it is resolved on first access
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# NullPool: each script run opens its own connections and closes them (good for Prefect tasks)
-engine = create_engine(DATABASE_URL, poolclass=NullPool, future=True)
 metadata = MetaData()
 
 
@@ -41,18 +85,20 @@ channels = Table(
     Column("subscribers", Integer),
     Column("total_views", BigInteger),
     Column("created_at", Date),  # channel creation/published date
+    Column("content_hash", String),  # hash of the other columns; unchanged rows are never rewritten
     Column("last_updated_at", TIMESTAMP, server_default=func.now(), onupdate=func.now())
 )
 
 videos = Table(
     "videos", metadata,
     Column("video_id", String, primary_key=True),
-    Column("channel_id", String, nullable=False),
+    Column("channel_id", String, nullable=False, index=True),
     Column("title", String),
     Column("description", String),
     Column("tags", String),
     Column("thumbnail_type", String),
     Column("published_at", TIMESTAMP),
+    Column("content_hash", String),
     Column("last_updated_at", TIMESTAMP, server_default=func.now(), onupdate=func.now())
     # You can add ForeignKey('channels.channel_id') later if you want strict FK enforcement
 )
@@ -66,7 +112,8 @@ channel_daily_stats = Table(
     Column("subs_lost", Integer),
     Column("estimated_minutes_watched", Float),
     Column("ingested_at", TIMESTAMP, server_default=func.now()),
-    PrimaryKeyConstraint("channel_id", "date")
+    PrimaryKeyConstraint("channel_id", "date"),
+    postgresql_partition_by="RANGE (date)",
 )
 
 video_daily_stats = Table(
@@ -81,7 +128,8 @@ video_daily_stats = Table(
     Column("avg_view_duration", Float),
     Column("avg_view_percent", Float),
     Column("ingested_at", TIMESTAMP, server_default=func.now()),
-    PrimaryKeyConstraint("video_id", "date")
+    PrimaryKeyConstraint("video_id", "date"),
+    postgresql_partition_by="RANGE (date)",
 )
 
 video_monthly_stats = Table(
@@ -99,87 +147,552 @@ video_monthly_stats = Table(
     PrimaryKeyConstraint("video_id", "month")
 )
 
+# Last day aggregated by each incremental rollup
+rollup_watermarks = Table(
+    "rollup_watermarks", metadata,
+    Column("name", String, primary_key=True),
+    Column("through_date", Date, nullable=False),
+    Column("updated_at", TIMESTAMP, server_default=func.now()),
+)
+
+# Channels whose stored videos cover their whole uploads playlist: a walk reached
+# its end and no later, newest-first discovery was cut short. Only these channels
+# may stop paging at the first known video.
+catalog_scans = Table(
+    "catalog_scans", metadata,
+    Column("channel_id", String, primary_key=True),
+    Column("completed_at", TIMESTAMP, server_default=func.now()),
+)
+
+# Daily stats are range-partitioned by month on `date`
+PARTITIONED_TABLES = (channel_daily_stats, video_daily_stats)
+# Months of partitions kept ready ahead of today
+PARTITIONS_AHEAD = 2
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+_BOUND_RE = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+# [(partition name, lower bound, upper bound)] of a partitioned table, oldest first.
+def _partitions(conn, table: Table) -> list[tuple[str, date, date]]:
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent)"
+    ), {"parent": table.name})
+    out = []
+    for name, bound in rows:
+        m = _BOUND_RE.search(bound or "")
+        if m:
+            out.append((name, date.fromisoformat(m.group(1)), date.fromisoformat(m.group(2))))
+    return sorted(out, key=lambda p: p[1])
+
+"""
+Create the monthly partitions covering [start, end] that don't exist yet.
+Run it once per run (it locks the parent tables), before writing rows for those dates.
+Rows that landed in the DEFAULT partition for such a month are moved into it.
+"""
+def ensure_partitions(start: date, end: date, tables: Sequence[Table] = PARTITIONED_TABLES, conn=None) -> int:
+    created = 0
+    with _connection(conn) as conn:
+        for t in tables:
+            existing = {lo for _name, lo, _hi in _partitions(conn, t)}
+            month = _month_start(start)
+            while month <= end:
+                nxt = _next_month(month)
+                if month not in existing:
+                    _create_partition(conn, t, month, nxt)
+                    created += 1
+                month = nxt
+    return created
+
+def _default_partition(t: Table) -> str:
+    return f"{t.name}_default"
+
+def _create_partition(conn, t: Table, lo: date, hi: date) -> None:
+    name = f"{t.name}_{lo:%Y_%m}"
+    bounds = f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+    default = _default_partition(t)
+    has_default = conn.execute(text("SELECT to_regclass(:d) IS NOT NULL"), {"d": default}).scalar()
+    in_default = has_default and conn.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE date >= :lo AND date < :hi)'
+    ), {"lo": lo, "hi": hi}).scalar()
+    if not in_default:
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{t.name}" {bounds}'))
+        return
+    # Postgres refuses a new partition while the default holds rows in its range
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{t.name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE date >= :lo AND date < :hi RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), {"lo": lo, "hi": hi})
+    conn.execute(text(f'ALTER TABLE "{t.name}" ATTACH PARTITION "{name}" {bounds}'))
+
+# Partitions from `since` (default: this month) through PARTITIONS_AHEAD months from now.
+def create_upcoming_partitions(since: date | None = None, conn=None) -> int:
+    today = date.today()
+    end = today
+    for _ in range(PARTITIONS_AHEAD):
+        end = _next_month(end)
+    return ensure_partitions(min(since or today, today), end, conn=conn)
+
+"""
+Convert plain (pre-partitioning) daily stats tables in place: rename the old
+table, create the partitioned one, create partitions for its date range, copy
+rows across and drop the old table. All in the caller's transaction.
+"""
+def _partition_legacy_tables(conn) -> None:
+    for t in PARTITIONED_TABLES:
+        kind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:n)"), {"n": t.name}
+        ).scalar()
+        if kind != "r":
+            continue
+        legacy = f"{t.name}_legacy"
+        conn.execute(text(f'ALTER TABLE "{t.name}" RENAME TO "{legacy}"'))
+        conn.execute(text(f'ALTER INDEX IF EXISTS "{t.name}_pkey" RENAME TO "{legacy}_pkey"'))
+        t.create(conn)
+        lo, hi = conn.execute(text(f'SELECT min(date), max(date) FROM "{legacy}"')).one()
+        if lo is not None:
+            ensure_partitions(lo, hi, [t], conn)
+        cols = ", ".join(f'"{c.name}"' for c in t.columns)
+        conn.execute(text(f'INSERT INTO "{t.name}" ({cols}) SELECT {cols} FROM "{legacy}"'))
+        conn.execute(text(f'DROP TABLE "{legacy}"'))
+
 def create_tables():
     """Create all tables if they do not already exist."""
-    metadata.create_all(engine)
+    with get_engine().begin() as conn:
+        _partition_legacy_tables(conn)
+        metadata.create_all(conn)
+        # Columns added after the first deploy
+        for t in (channels, videos):
+            conn.execute(text(f'ALTER TABLE "{t.name}" ADD COLUMN IF NOT EXISTS content_hash VARCHAR'))
+        # and indexes: create_all skips tables that already exist
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_videos_channel_id ON videos (channel_id)"))
+        # Catch-all for dates outside the monthly partitions (writes that skipped
+        # ensure_partitions); ensure_partitions moves such rows out again
+        for t in PARTITIONED_TABLES:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{_default_partition(t)}" PARTITION OF "{t.name}" DEFAULT'
+            ))
+        create_upcoming_partitions(conn=conn)
+
+"""
+Unit of work: one pooled connection, one transaction.
+Pass the yielded connection as conn= to the write helpers below; everything
+commits together when the block exits, or rolls back together on error.
+"""
+@contextmanager
+def transaction():
+    with get_engine().begin() as conn:
+        yield conn
+
+# Use the caller's transaction if given, else a short one of our own.
+@contextmanager
+def _connection(conn=None):
+    if conn is not None:
+        yield conn
+    else:
+        with get_engine().begin() as own:
+            yield own
+
+# Postgres caps one statement at 65535 bind parameters.
+MAX_BIND_PARAMS = 65535
+# Batches at least this large go through COPY + staging table instead of INSERT ... VALUES.
+BULK_LOAD_THRESHOLD = int(os.getenv("DB_BULK_LOAD_THRESHOLD", "100"))
+
+def _chunked(rows: Sequence[dict], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+# Timestamps maintained by the database; they never count as a content change.
+_BOOKKEEPING_COLS = {"last_updated_at", "ingested_at", "rolled_up_at"}
+
+class UpsertResult(NamedTuple):
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0   # identical to what is stored; never written
+
+def _row_hash(row: dict) -> str:
+    data = {k: v for k, v in row.items() if k != "content_hash" and k not in _BOOKKEEPING_COLS}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+# Last row per key, in first-seen key order (a batch may repeat a key; the last one wins,
+# as in _merge_staged). Returns (rows, number of superseded duplicates).
+def _dedupe(rows: Sequence[dict], conflict_cols: Sequence[str]) -> tuple[list[dict], int]:
+    by_key = {tuple(r[c] for c in conflict_cols): r for r in rows}
+    return list(by_key.values()), len(rows) - len(by_key)
+
+"""
+For tables with a content_hash column (single-column key): stamp each row with
+its hash and drop rows whose hash matches the stored one, in one keyed lookup per
+10k rows. Returns (rows still to write, number dropped).
+"""
+def _drop_unchanged(conn, table: Table, rows: Sequence[dict], conflict_cols: Sequence[str]):
+    if "content_hash" not in table.c or len(conflict_cols) != 1:
+        return list(rows), 0
+
+    key = table.c[conflict_cols[0]]
+    hashed = [{**r, "content_hash": _row_hash(r)} for r in rows]
+    stored: dict = {}
+    for chunk in _chunked(hashed, 10000):
+        stmt = select(key, table.c.content_hash).where(key.in_([r[key.name] for r in chunk]))
+        stored.update((k, h) for k, h in conn.execute(stmt))
+    changed = [r for r in hashed if stored.get(r[key.name]) != r["content_hash"]]
+    return changed, len(hashed) - len(changed)
+
+# Columns whose change justifies rewriting a row.
+def _compare_cols(cols, conflict_cols: Sequence[str]) -> list[str]:
+    return [c for c in cols if c not in conflict_cols and c not in _BOOKKEEPING_COLS]
+
+# Time each write as db_upsert_seconds{table,path}, count its rows by outcome,
+# and book the time as the current channel's "db_write" stage.
+def _measured(path: str):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(table: Table, *args, **kwargs) -> UpsertResult:
+            t0 = time.perf_counter()
+            res = fn(table, *args, **kwargs)
+            elapsed = time.perf_counter() - t0
+            metrics.observe("db_upsert_seconds", elapsed, table=table.name, path=path)
+            metrics.stage_time("db_write", elapsed)
+            for outcome, n in res._asdict().items():
+                if n:
+                    metrics.inc("db_rows_total", n, table=table.name, result=outcome)
+            return res
+        return wrapper
+    return deco
 
 """
 Bulk upsert rows into table using Postgres ON CONFLICT.
 conflict_cols must match a unique index or primary key (here: PK columns).
+Rows are sent in chunks that stay under the bind-parameter limit, all in one transaction.
+Change-aware: rows whose content hash matches what is stored are skipped before
+the database sees them, and the DO UPDATE only fires when the row IS DISTINCT FROM excluded.
 """
-def _upsert(table: Table, rows: Sequence[dict], conflict_cols: Sequence[str]) -> int:
+@_measured("values")
+def _upsert(table: Table, rows: Sequence[dict], conflict_cols: Sequence[str], conn=None) -> UpsertResult:
     if not rows:
-        return 0
+        return UpsertResult()
 
-    stmt = pg_insert(table).values(list(rows))
+    inserted = updated = 0
+    rows, _superseded = _dedupe(rows, conflict_cols)
+    with _connection(conn) as conn:
+        rows, skipped = _drop_unchanged(conn, table, rows, conflict_cols)
+        if not rows:
+            return UpsertResult(skipped=skipped)
 
-    excluded = {col.name: col for col in stmt.excluded}
+        batch_size = max(1, MAX_BIND_PARAMS // max(1, len(rows[0])))
+        for chunk in _chunked(rows, batch_size):
+            stmt = pg_insert(table).values(list(chunk))
 
-    update_map = {
-        col.name: excluded[col.name]
-        for col in table.columns
-        if col.name not in conflict_cols   
-        and col.name in excluded           
-    }
+            excluded = {col.name: col for col in stmt.excluded}
 
-    stmt = stmt.on_conflict_do_update(
-        index_elements=list(conflict_cols),
-        set_=update_map
-    )
+            update_map = {
+                col.name: excluded[col.name]
+                for col in table.columns
+                if col.name not in conflict_cols
+                and col.name in excluded
+            }
+            cmp = _compare_cols(chunk[0].keys(), conflict_cols)
+
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_cols),
+                set_=update_map,
+                where=tuple_(*[table.c[c] for c in cmp]).is_distinct_from(
+                    tuple_(*[excluded[c] for c in cmp])
+                ) if cmp else None
+            ).returning(literal_column("1"))
 
-    with engine.begin() as conn:
-        conn.execute(stmt)
+            # Keys that already exist can only be updated or skipped; the rest are inserts.
+            # (RETURNING xmax would tell them apart, but partitioned tables don't allow it.)
+            keys = {tuple(r[c] for c in conflict_cols) for r in chunk}
+            existing = conn.execute(
+                select(func.count()).select_from(table).where(
+                    tuple_(*[table.c[c] for c in conflict_cols]).in_(list(keys))
+                )
+            ).scalar()
+            written = len(conn.execute(stmt).all())
+            inserted += len(keys) - existing
+            updated += written - (len(keys) - existing)
+            skipped += len(chunk) - written
 
-    return len(rows)
+    return UpsertResult(inserted, updated, skipped)
+
+# One value in COPY ... (FORMAT csv): unquoted empty field is NULL, strings are always quoted.
+def _copy_field(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+"""
+COPY the csv in buf (columns `cols`) into a temporary staging table, then merge
+it into table with a single INSERT ... SELECT ... ON CONFLICT.
+Duplicate keys within the batch resolve to the last row given and are counted
+once. Returns UpsertResult for the distinct staged keys.
+"""
+def _merge_staged(conn, table: Table, cols: list[str], conflict_cols: Sequence[str], buf) -> UpsertResult:
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    key_list = ", ".join(f'"{c}"' for c in conflict_cols)
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols if c not in conflict_cols)
+    cmp = _compare_cols(cols, conflict_cols)
+    where = ""
+    if cmp:
+        where = (
+            " WHERE (" + ", ".join(f'"{table.name}"."{c}"' for c in cmp) + ")"
+            " IS DISTINCT FROM (" + ", ".join(f'EXCLUDED."{c}"' for c in cmp) + ")"
+        )
+    stage = f"_stage_{table.name}"
+
+    with conn.connection.cursor() as cur:
+        cur.execute(
+            f'CREATE TEMP TABLE {stage} (LIKE "{table.name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+        cur.copy_expert(f"COPY {stage} ({col_list}) FROM STDIN WITH (FORMAT csv)", buf)
+        # Keys that already exist can only be updated or skipped; the rest are inserts
+        cur.execute(
+            f'SELECT count(*), count(t."{conflict_cols[0]}") FROM (SELECT DISTINCT {key_list} FROM {stage}) s '
+            f'LEFT JOIN "{table.name}" t USING ({key_list})'
+        )
+        distinct_rows, existing = cur.fetchone()
+        cur.execute(
+            f'INSERT INTO "{table.name}" ({col_list}) '
+            f"SELECT DISTINCT ON ({key_list}) {col_list} FROM {stage} "
+            f"ORDER BY {key_list}, ctid DESC "
+            f"ON CONFLICT ({key_list}) DO UPDATE SET {updates}{where} "
+            f"RETURNING 1"
+        )
+        written = len(cur.fetchall())
+        cur.execute(f"DROP TABLE {stage}")
+
+    inserted = distinct_rows - existing
+    return UpsertResult(inserted, written - inserted, distinct_rows - written)
+
+"""
+Upsert a large batch by streaming it with COPY into a temporary staging table,
+then merging with a single INSERT ... SELECT ... ON CONFLICT.
+Only the columns present in the rows are loaded; server defaults fill the rest.
+Change-aware like _upsert.
+"""
+@_measured("copy")
+def _bulk_load(table: Table, rows: Sequence[dict], conflict_cols: Sequence[str], conn=None) -> UpsertResult:
+    if not rows:
+        return UpsertResult()
+
+    rows, _superseded = _dedupe(rows, conflict_cols)
+    with _connection(conn) as conn:
+        rows, skipped = _drop_unchanged(conn, table, rows, conflict_cols)
+        if not rows:
+            return UpsertResult(skipped=skipped)
+
+        cols = [c.name for c in table.columns if c.name in rows[0]]
+        buf = io.StringIO()
+        for r in rows:
+            buf.write(",".join(_copy_field(r.get(c)) for c in cols))
+            buf.write("\n")
+        buf.seek(0)
+        res = _merge_staged(conn, table, cols, conflict_cols, buf)
+    return res._replace(skipped=res.skipped + skipped)
+
+# One array as COPY csv fields (see _copy_field), converted in bulk where NumPy can.
+def _copy_column(arr: np.ndarray) -> list[str]:
+    if arr.dtype.kind == "M":
+        out = arr.astype(str)
+        out[np.isnat(arr)] = ""
+        return out.tolist()
+    if arr.dtype.kind in "iuf":
+        return arr.astype(str).tolist()
+    return [_copy_field(v) for v in arr.tolist()]
+
+"""
+Upsert columnar.Columns (column name -> array). Large batches are written to
+COPY straight from the arrays, with no per-row dicts; small ones, and tables
+with a content hash, go through the row path.
+"""
+def _upsert_columns(table: Table, cols: Columns, conflict_cols: Sequence[str], conn=None) -> UpsertResult:
+    n = num_rows(cols)
+    if n < BULK_LOAD_THRESHOLD or "content_hash" in table.c:
+        return _upsert_auto(table, to_rows(cols), conflict_cols, conn)
+
+    return _copy_columns(table, cols, conflict_cols, conn)
+
+@_measured("copy_columns")
+def _copy_columns(table: Table, cols: Columns, conflict_cols: Sequence[str], conn=None) -> UpsertResult:
+    names = [c.name for c in table.columns if c.name in cols]
+    fields = [_copy_column(cols[c]) for c in names]
+    buf = io.StringIO()
+    buf.write("\n".join(map(",".join, zip(*fields))))
+    buf.write("\n")
+    buf.seek(0)
+    with _connection(conn) as conn:
+        return _merge_staged(conn, table, names, conflict_cols, buf)
+
+# Small batches via INSERT ... VALUES, large ones via COPY.
+def _upsert_auto(table: Table, rows: Sequence[dict], conflict_cols: Sequence[str], conn=None) -> UpsertResult:
+    if len(rows) >= BULK_LOAD_THRESHOLD:
+        return _bulk_load(table, rows, conflict_cols, conn)
+    return _upsert(table, rows, conflict_cols, conn)
 
 # Convenience Wrappersh
-def upsert_channels(rows: Sequence[dict]):          return _upsert(channels, rows, ["channel_id"])
-def upsert_videos(rows: Sequence[dict]):            return _upsert(videos, rows, ["video_id"])
-def upsert_channel_daily(rows: Sequence[dict]):     return _upsert(channel_daily_stats, rows, ["channel_id", "date"])
-def upsert_video_daily(rows: Sequence[dict]):       return _upsert(video_daily_stats, rows, ["video_id", "date"])
-def upsert_video_monthly(rows: Sequence[dict]):     return _upsert(video_monthly_stats, rows, ["video_id", "month"])
+def upsert_channels(rows: Sequence[dict], conn=None):          return _upsert(channels, rows, ["channel_id"], conn)
+def upsert_videos(rows: Sequence[dict], conn=None):            return _upsert(videos, rows, ["video_id"], conn)
+def upsert_channel_daily(rows: Sequence[dict], conn=None):     return _upsert_auto(channel_daily_stats, rows, ["channel_id", "date"], conn)
+def upsert_video_daily(rows: Sequence[dict], conn=None):       return _upsert_auto(video_daily_stats, rows, ["video_id", "date"], conn)
+def upsert_video_monthly(rows: Sequence[dict], conn=None):     return _upsert(video_monthly_stats, rows, ["video_id", "month"], conn)
+def upsert_channel_daily_columns(cols: Columns, conn=None):    return _upsert_columns(channel_daily_stats, cols, ["channel_id", "date"], conn)
+def upsert_video_daily_columns(cols: Columns, conn=None):      return _upsert_columns(video_daily_stats, cols, ["video_id", "date"], conn)
+
+
+# All video IDs already stored for channel_id (one indexed query).
+def fetch_known_video_ids(channel_id: str) -> set[str]:
+    stmt = select(videos.c.video_id).where(videos.c.channel_id == channel_id)
+    with get_engine().connect() as conn:
+        return set(conn.execute(stmt).scalars())
+
+# True if channel_id's stored catalog has no gaps (see catalog_scans).
+def catalog_complete(channel_id: str, conn=None) -> bool:
+    with _connection(conn) as conn:
+        stmt = select(catalog_scans.c.channel_id).where(catalog_scans.c.channel_id == channel_id)
+        return conn.execute(stmt).first() is not None
+
+def set_catalog_complete(channel_id: str, complete: bool, conn=None) -> None:
+    with _connection(conn) as conn:
+        if complete:
+            conn.execute(
+                pg_insert(catalog_scans).values(channel_id=channel_id)
+                .on_conflict_do_update(index_elements=["channel_id"], set_={"completed_at": func.now()})
+            )
+        else:
+            conn.execute(catalog_scans.delete().where(catalog_scans.c.channel_id == channel_id))
 
 
 """
-Delete rows older than 'retain_days' from video_daily_stats.
-Returns number of rows deleted (rowcount may be -1 if unknown).
+Retention for a partitioned table: drop every partition that lies wholly before
+`cutoff`, then delete the remaining older rows (which only touches the one
+partition straddling the cutoff). Returns (partitions dropped, rows deleted).
 """
-def prune_old_video_daily(retain_days: int = 30) -> int:
+def drop_partitions_before(table: Table, cutoff: date, conn=None) -> tuple[int, int]:
+    dropped = 0
+    with _connection(conn) as conn:
+        for name, _lo, hi in _partitions(conn, table):
+            if hi <= cutoff:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+                dropped += 1
+        result = conn.execute(table.delete().where(table.c.date < cutoff))
+        return dropped, result.rowcount or 0
+
+# Last day rolled into video_monthly_stats, or None before the first rollup.
+def get_rollup_watermark(name: str = "video_monthly", conn=None) -> date | None:
+    with _connection(conn) as conn:
+        return conn.execute(
+            select(rollup_watermarks.c.through_date).where(rollup_watermarks.c.name == name)
+        ).scalar()
+
+"""
+Drop video_daily_stats data older than 'retain_days' (once per run).
+Never drops days the monthly rollup hasn't aggregated yet (once it has a watermark).
+Days at or before the watermark are dropped even if they were written after the
+rollup ran (they can't be added to the monthly totals again); main.py therefore
+never fetches per-video stats for them.
+Whole months go by dropping their partition; returns the number of rows
+deleted from the partially expired month (rowcount may be -1 if unknown).
+"""
+def prune_old_video_daily(retain_days: int = 30, conn=None) -> int:
     cutoff = date.today() - timedelta(days=retain_days)
-    with engine.begin() as conn:
-        result = conn.execute(
-            video_daily_stats.delete().where(video_daily_stats.c.date < cutoff)
-        )
-        return result.rowcount or 0
+    with _connection(conn) as conn:
+        wm = get_rollup_watermark(conn=conn)
+        if wm is not None:
+            cutoff = min(cutoff, wm + timedelta(days=1))
+        _dropped, deleted = drop_partitions_before(video_daily_stats, cutoff, conn)
+        return deleted
 
 """
-Aggregate daily rows older than `retain_days` into monthly rows,
-then delete those daily rows.  Idempotent via upsert.
+Roll closed days of video_daily_stats into video_monthly_stats, server-side and
+incrementally, in one transaction under an advisory lock (concurrent rollups
+would add the same days twice): only days after the 'video_monthly' watermark
+and before today - retain_days are aggregated, then added onto existing monthly
+rows with a single INSERT ... SELECT ... ON CONFLICT. Averages are view-weighted
+so repeated partial-month rollups stay exact. Daily rows are left for retention
+(prune_old_video_daily) to drop. Returns the number of monthly rows written.
 """
-def rollup_video_daily_to_monthly(retain_days: int = 30) -> None:
+def rollup_video_daily_to_monthly(retain_days: int = 30, conn=None) -> int:
     cutoff = date.today() - timedelta(days=retain_days)
-    month_expr = func.date_trunc("month", video_daily_stats.c.date).cast(Date)
-
-    agg_stmt = (
-        select(
-            video_daily_stats.c.video_id.label("video_id"),
-            month_expr.label("month"),
-            func.sum(video_daily_stats.c.views).label("views"),
-            func.sum(video_daily_stats.c.likes).label("likes"),
-            func.sum(video_daily_stats.c.comments).label("comments"),
-            func.sum(video_daily_stats.c.shares).label("shares"),
-            func.sum(video_daily_stats.c.watch_time).label("watch_time"),
-            func.avg(video_daily_stats.c.avg_view_duration).label("avg_view_duration"),
-            func.avg(video_daily_stats.c.avg_view_percent).label("avg_view_percent"),
+    d = video_daily_stats.c
+    m = video_monthly_stats.c
+
+    with _connection(conn) as conn:
+        # Held until commit. SELECT ... FOR UPDATE on the watermark would lock
+        # nothing before the first rollup has created its row
+        conn.execute(select(func.pg_advisory_xact_lock(func.hashtext("rollup:video_monthly"))))
+        wm = conn.execute(
+            select(rollup_watermarks.c.through_date)
+            .where(rollup_watermarks.c.name == "video_monthly")
+        ).scalar()
+        through = cutoff - timedelta(days=1)
+        if wm is not None and wm >= through:
+            return 0
+
+        month_expr = func.date_trunc("month", d.date).cast(Date)
+        window = d.date <= through
+        if wm is not None:
+            window = window & (d.date > wm)
+
+        agg_stmt = (
+            select(
+                d.video_id,
+                month_expr,
+                func.sum(d.views),
+                func.sum(d.likes),
+                func.sum(d.comments),
+                func.sum(d.shares),
+                func.sum(d.watch_time),
+                func.sum(d.avg_view_duration * d.views) / func.nullif(func.sum(d.views), 0),
+                func.sum(d.avg_view_percent * d.views) / func.nullif(func.sum(d.views), 0),
+            )
+            .where(window)
+            .group_by(d.video_id, month_expr)
         )
-        .where(video_daily_stats.c.date < cutoff)
-        .group_by(video_daily_stats.c.video_id, month_expr)
-    )
+        stmt = pg_insert(video_monthly_stats).from_select(
+            ["video_id", "month", "views", "likes", "comments", "shares",
+             "watch_time", "avg_view_duration", "avg_view_percent"],
+            agg_stmt,
+        )
+        ex = stmt.excluded
+        old_views = func.coalesce(m.views, 0)
+        new_views = func.coalesce(ex.views, 0)
 
-    with engine.begin() as conn:
-        rows = [dict(r._mapping) for r in conn.execute(agg_stmt)]
-        if rows:
-            upsert_video_monthly(rows)
-            conn.execute(
-                video_daily_stats.delete().where(video_daily_stats.c.date < cutoff)
+        def _weighted(col: str):
+            return (
+                func.coalesce(m[col] * old_views, 0) + func.coalesce(ex[col] * new_views, 0)
+            ) / func.nullif(old_views + new_views, 0)
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["video_id", "month"],
+            set_={
+                "views": old_views + new_views,
+                "likes": func.coalesce(m.likes, 0) + func.coalesce(ex.likes, 0),
+                "comments": func.coalesce(m.comments, 0) + func.coalesce(ex.comments, 0),
+                "shares": func.coalesce(m.shares, 0) + func.coalesce(ex.shares, 0),
+                "watch_time": func.coalesce(m.watch_time, 0) + func.coalesce(ex.watch_time, 0),
+                "avg_view_duration": _weighted("avg_view_duration"),
+                "avg_view_percent": _weighted("avg_view_percent"),
+                "rolled_up_at": func.now(),
+            },
+        )
+        written = conn.execute(stmt).rowcount or 0
+
+        conn.execute(
+            pg_insert(rollup_watermarks)
+            .values(name="video_monthly", through_date=through)
+            .on_conflict_do_update(
+                index_elements=["name"],
+                set_={"through_date": through, "updated_at": func.now()},
             )
+        )
+        return written
@@ -0,0 +1,107 @@
+import os
+from datetime import date
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import BigInteger, Date, Float, Integer, String, TIMESTAMP, Table, select
+from src import db
+from src.db import channel_daily_stats, video_daily_stats, video_monthly_stats
+
+# Rows fetched per server-side cursor batch, and written per Parquet row group
+EXPORT_BATCH_ROWS = int(os.getenv("PARQUET_BATCH_ROWS", "50000"))
+
+# Files land in <dir>/<table>/<partition column>=<value>/part-0.parquet (Hive layout)
+DAILY_TABLES = ((channel_daily_stats, "date"), (video_daily_stats, "date"))
+MONTHLY_TABLES = ((video_monthly_stats, "month"),)
+
+def _arrow_type(col_type) -> pa.DataType:
+    if isinstance(col_type, BigInteger):
+        return pa.int64()
+    if isinstance(col_type, Integer):
+        return pa.int32()
+    if isinstance(col_type, Float):
+        return pa.float64()
+    if isinstance(col_type, Date):
+        return pa.date32()
+    if isinstance(col_type, TIMESTAMP):
+        return pa.timestamp("us")
+    if isinstance(col_type, String):
+        return pa.string()
+    raise TypeError(f"no Parquet type for {col_type!r}")
+
+# Arrow schema of table (per src/db.py), minus the Hive partition column.
+def arrow_schema(table: Table, partition_col: str) -> pa.Schema:
+    return pa.schema([
+        pa.field(c.name, _arrow_type(c.type), nullable=c.nullable)
+        for c in table.columns if c.name != partition_col
+    ])
+
+def _partition_path(out_dir: Path, table: Table, partition_col: str, value: date) -> Path:
+    return out_dir / table.name / f"{partition_col}={value.isoformat()}" / "part-0.parquet"
+
+# Partition values present in the database, optionally from `since` on.
+def _partition_values(conn, table: Table, partition_col: str, since: date | None) -> list[date]:
+    col = table.c[partition_col]
+    stmt = select(col).distinct().order_by(col)
+    if since is not None:
+        stmt = stmt.where(col >= since)
+    return list(conn.execute(stmt).scalars())
+
+"""
+Write one partition with a server-side cursor: at most batch_rows rows are in
+memory at once, each becoming one row group. The file is written beside its
+final path and renamed into place, so readers never see a partial snapshot.
+Returns rows written.
+"""
+def _export_partition(conn, table: Table, partition_col: str, value: date, path: Path,
+                      batch_rows: int) -> int:
+    schema = arrow_schema(table, partition_col)
+    cols = [table.c[name] for name in schema.names]
+    stmt = (
+        select(*cols)
+        .where(table.c[partition_col] == value)
+        .order_by(*table.primary_key.columns)
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    rows = 0
+    result = conn.execution_options(stream_results=True, max_row_buffer=batch_rows).execute(stmt)
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        for chunk in result.partitions(batch_rows):
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(
+                [pa.array(columns[i], type=f.type) for i, f in enumerate(schema)], schema=schema
+            ))
+            rows += len(chunk)
+    tmp.replace(path)
+    return rows
+
+"""
+Export table to date-partitioned Parquet under out_dir.
+since      - only partitions on or after this date (None: all of them); existing
+             files for those partitions are rewritten with the current rows
+only_new   - skip partitions that already have a file on disk
+Returns {partition value: rows written}.
+"""
+def export_table(table: Table, partition_col: str, out_dir, since: date | None = None,
+                 only_new: bool = False, batch_rows: int = EXPORT_BATCH_ROWS) -> dict[date, int]:
+    out_dir = Path(out_dir)
+    written: dict[date, int] = {}
+    with db.get_engine().connect() as conn:
+        for value in _partition_values(conn, table, partition_col, since):
+            path = _partition_path(out_dir, table, partition_col, value)
+            if only_new and path.exists():
+                continue
+            written[value] = _export_partition(conn, table, partition_col, value, path, batch_rows)
+    return written
+
+def _export_all(tables, out_dir, since: date | None, only_new: bool) -> dict[str, dict[date, int]]:
+    return {t.name: export_table(t, col, out_dir, since, only_new) for t, col in tables}
+
+# Daily stats tables, one file per day. Run before retention drops the partitions.
+def export_daily(out_dir, since: date | None = None, only_new: bool = False) -> dict[str, dict[date, int]]:
+    return _export_all(DAILY_TABLES, out_dir, since, only_new)
+
+# video_monthly_stats, one file per month. Run after the rollup.
+def export_monthly(out_dir, since: date | None = None, only_new: bool = False) -> dict[str, dict[date, int]]:
+    return _export_all(MONTHLY_TABLES, out_dir, since, only_new)
@@ -1,117 +1,166 @@
+import time
 from datetime import date, timedelta
-import time, functools
+from typing import Generator, Iterable, Iterator
 from googleapiclient.errors import HttpError
+from src import cache, metrics, ratelimit
+from src.quota import current_channel, get_ledger
 
-# Retry decorator
-def retry(backoff: float = 1.6, max_attempts: int = 5, statuses=(403, 500, 503, 504)):
-    def deco(fn):
-        @functools.wraps(fn)
-        def wrapped(*args, **kw):
-            attempt = 0
-            while True:
-                try:
-                    return fn(*args, **kw)
-                except HttpError as e:
-                    status = getattr(e, "resp", None).status if getattr(e, "resp", None) else None
-                    attempt += 1
-                    if status not in statuses or attempt >= max_attempts:
-                        raise
-                    time.sleep(backoff ** attempt)
-        return wrapped
-    return deco
+"""
+Execute one API request through the shared rate limiter (src/ratelimit.py),
+charging every attempt's quota cost to the run ledger.
+Data API calls share the API key; Analytics calls are limited per channel credential.
+Responses go through the on-disk cache (src/cache.py), and so do the error
+answers callers handle (404 for a missing playlist): in replay mode nothing
+reaches the network and a missing response raises cache.CacheMiss.
+Each call's wall time (waits and retries included) counts toward the current
+channel's stage for that endpoint.
+"""
+def _execute(request, api: str, endpoint: str) -> dict:
+    t0 = time.perf_counter()
+    try:
+        return _execute_once(request, api, endpoint)
+    finally:
+        metrics.stage_time(ENDPOINT_STAGES.get(endpoint, endpoint), time.perf_counter() - t0)
+
+ENDPOINT_STAGES = {
+    "channels.list": "channel_metadata",
+    "playlistItems.list": "playlist",
+    "videos.list": "video_metadata",
+    "reports.query": "analytics",
+}
+
+def _execute_once(request, api: str, endpoint: str) -> dict:
+    # Keyed before execute(), which may turn a long GET into a POST
+    key = cache.request_key(api, endpoint, request)
+    cached = cache.lookup(api, endpoint, key, getattr(request, "uri", None))
+    if cached is not None:
+        metrics.inc("api_cache_hits_total", api=api, endpoint=endpoint)
+        return cached
+
+    credential = "key"
+    if api == "youtubeAnalytics":
+        credential = current_channel.get() or credential
+
+    def _attempt() -> dict:
+        get_ledger().charge(api, endpoint)
+        metrics.inc("api_calls_total", api=api, endpoint=endpoint)
+        with metrics.timer("api_call_seconds", api=api, endpoint=endpoint):
+            return request.execute()
+
+    try:
+        resp = ratelimit.call(api, credential, _attempt)
+    except HttpError as e:
+        cache.store_error(api, endpoint, key, e)
+        raise
+    cache.store(api, endpoint, key, resp)
+    return resp
 
 
 # YT Data API (Key)
-@retry()
 def fetch_channel_metadata(youtube_pub, channel_id: str) -> dict:
     """Fetch one channel's snippet, statistics, contentDetails. Return {} if not found."""
-    resp = youtube_pub.channels().list(
+    resp = _execute(youtube_pub.channels().list(
         part="snippet,statistics,contentDetails",
         id=channel_id,
         maxResults=1
-    ).execute()
+    ), "youtube", "channels.list")
     items = resp.get("items", [])
     return items[0] if items else {}
 
 """
-Walk the uploads playlist (newest first) and collect video IDs.
-Early-stop if we hit a known ID. Returns [] if playlist not found (new channel).
+Fetch snippet, statistics, contentDetails for many channels, 50 IDs per request.
+Returns {channel_id: raw channel item}; channels not found are absent.
+"""
+def fetch_channels_metadata_bulk(youtube_pub, channel_ids: list[str]) -> dict[str, dict]:
+    items: dict[str, dict] = {}
+    for chunk in _chunked(channel_ids, 50):
+        resp = _execute(youtube_pub.channels().list(
+            part="snippet,statistics,contentDetails",
+            id=",".join(chunk),
+            maxResults=len(chunk)
+        ), "youtube", "channels.list")
+        for item in resp.get("items", []):
+            items[item["id"]] = item
+    return items
+
+"""
+Walk the uploads playlist (newest first), yielding one page of video IDs at a time.
+Early-stop at the first known ID. Yields nothing if playlist not found (new channel).
+The generator's return value (StopIteration.value) is False if max_pages cut
+the walk short, True if it reached the end or a known ID.
 """
-@retry()
 def fetch_upload_playlist_video_ids(
     youtube_pub,
     uploads_playlist_id: str,
     stop_after_known: set[str] | None = None,
     max_pages: int | None = None
-) -> list[str]:
-    video_ids: list[str] = []
+) -> Generator[list[str], None, bool]:
     page_token = None
     pages = 0
     while True:
         try:
-            resp = youtube_pub.playlistItems().list(
+            resp = _execute(youtube_pub.playlistItems().list(
                 part="contentDetails",
                 playlistId=uploads_playlist_id,
                 maxResults=50,
                 pageToken=page_token
-            ).execute()
+            ), "youtube", "playlistItems.list")
         except HttpError as e:
             status = getattr(e, "resp", None).status if getattr(e, "resp", None) else None
             if status == 404:
-                return []  # empty channel
+                return True  # empty channel
             raise
 
+        page: list[str] = []
         for item in resp.get("items", []):
             vid = item["contentDetails"]["videoId"]
             if stop_after_known and vid in stop_after_known:
-                return video_ids
-            video_ids.append(vid)
+                if page:
+                    yield page
+                return True
+            page.append(vid)
+        if page:
+            yield page
 
         page_token = resp.get("nextPageToken")
         pages += 1
         if not page_token:
-            break
+            return True
         if max_pages and pages >= max_pages:
-            break
-    return video_ids
+            return False
 
 # Successive size-length chunks.
 def _chunked(seq: list[str], size: int):
     for i in range(0, len(seq), size):
         yield seq[i:i + size]
 
-# Batch fetch stats (50 IDs per call)
-@retry()
-def fetch_video_metadata_bulk(youtube_pub, video_ids: list[str]) -> list[dict]:
-    if not video_ids:
-        return []
-    items: list[dict] = []
-    for chunk in _chunked(video_ids, 50):
-        resp = youtube_pub.videos().list(
+# Batch fetch stats (50 IDs per call), yielding each call's items
+def fetch_video_metadata_bulk(youtube_pub, video_ids: Iterable[str]) -> Iterator[list[dict]]:
+    for chunk in _chunked(list(video_ids), 50):
+        resp = _execute(youtube_pub.videos().list(
             part="snippet,statistics",
             id=",".join(chunk),
             maxResults=len(chunk)
-        ).execute()
-        items.extend(resp.get("items", []))
-    return items
+        ), "youtube", "videos.list")
+        items = resp.get("items", [])
+        if items:
+            yield items
 
 # Analytics API (OAuth) 
-@retry()
 def fetch_channel_daily_analytics(
     analytics,
     channel_id: str,
     start: date,
     end: date
 ) -> dict:
-    return analytics.reports().query(
+    return _execute(analytics.reports().query(
         ids=f"channel=={channel_id}",
         startDate=start.isoformat(),
         endDate=end.isoformat(),
         dimensions="day",
         metrics="views,subscribersGained,subscribersLost,estimatedMinutesWatched"
-    ).execute()
+    ), "youtubeAnalytics", "reports.query")
 
-@retry()
 def fetch_video_daily_analytics(
     analytics,
     channel_id: str,
@@ -119,7 +168,7 @@ def fetch_video_daily_analytics(
     start: date,
     end: date
 ) -> dict:
-    return analytics.reports().query(
+    return _execute(analytics.reports().query(
         ids=f"channel=={channel_id}",
         startDate=start.isoformat(),
         endDate=end.isoformat(),
@@ -130,4 +179,57 @@ def fetch_video_daily_analytics(
         ),
         dimensions="day",
         filters=f"video=={video_id}"
-    ).execute()
\ No newline at end of file
+    ), "youtubeAnalytics", "reports.query")
+
+# Analytics reports that include the video dimension are paged at this size.
+ANALYTICS_PAGE_SIZE = 200
+# Video IDs per `video==id1,id2,...` filter.
+VIDEO_FILTER_BATCH = 200
+
+def _query_video_daily_page(
+    analytics,
+    channel_id: str,
+    video_ids: list[str],
+    start: date,
+    end: date,
+    start_index: int
+) -> dict:
+    return _execute(analytics.reports().query(
+        ids=f"channel=={channel_id}",
+        startDate=start.isoformat(),
+        endDate=end.isoformat(),
+        metrics=(
+            "views,likes,comments,shares,"
+            "averageViewDuration,averageViewPercentage,"
+            "estimatedMinutesWatched"
+        ),
+        dimensions="video,day",
+        filters="video==" + ",".join(video_ids),
+        sort="day",
+        maxResults=ANALYTICS_PAGE_SIZE,
+        startIndex=start_index
+    ), "youtubeAnalytics", "reports.query")
+
+"""
+Per-video daily analytics for many videos at once (dimensions=video,day).
+Yields one raw response per page; feed them to transform_many_video_daily.
+"""
+def fetch_many_video_daily_analytics(
+    analytics,
+    channel_id: str,
+    video_ids: list[str],
+    start: date,
+    end: date,
+    batch_size: int = VIDEO_FILTER_BATCH
+) -> Iterator[dict]:
+    for chunk in _chunked(video_ids, batch_size):
+        start_index = 1
+        while True:
+            resp = _query_video_daily_page(
+                analytics, channel_id, chunk, start, end, start_index
+            )
+            yield resp
+            rows = resp.get("rows") or []
+            if len(rows) < ANALYTICS_PAGE_SIZE:
+                break
+            start_index += len(rows)
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from src.config import STATE_DIR
+
+JOURNAL_FILE = STATE_DIR / "journal.sqlite"
+
+# channel_id used for run-level stages (rollup, prune, ...)
+RUN_SCOPE = "*"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    start_date  TEXT NOT NULL,
+    end_date    TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS units (
+    run_id      TEXT NOT NULL,
+    channel_id  TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    start_date  TEXT NOT NULL,
+    end_date    TEXT NOT NULL,
+    status      TEXT NOT NULL,   -- pending | done | failed
+    error       TEXT,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (run_id, channel_id, stage, start_date, end_date)
+);
+"""
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+"""
+Durable record of each run and of every (channel, stage, date range) unit as it
+completes, in a local SQLite file. Used to resume a run that died partway and to
+re-run only the channels a previous run didn't finish.
+Each channel has one "ingest" unit for the whole run (pending until the channel
+finishes) plus one unit per piece of work that was written: "discovery", and
+"channel_daily" / "video_daily" per date chunk.
+"""
+class RunJournal:
+    def __init__(self, path=JOURNAL_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    # New run over channel_ids; with carry_over_from, the units that run finished
+    # for these channels count as done in the new one too
+    def start_run(self, start: date, end: date, channel_ids: list[str], stage: str = "ingest",
+                  carry_over_from: str | None = None) -> str:
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO runs (run_id, started_at, start_date, end_date) VALUES (?, ?, ?, ?)",
+                (run_id, _now(), start.isoformat(), end.isoformat()),
+            )
+            self._db.executemany(
+                "INSERT INTO units VALUES (?, ?, ?, ?, ?, 'pending', NULL, ?)",
+                [(run_id, cid, stage, start.isoformat(), end.isoformat(), _now()) for cid in channel_ids],
+            )
+            if carry_over_from:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO units "
+                    "SELECT ?, channel_id, stage, start_date, end_date, status, error, updated_at FROM units "
+                    "WHERE run_id = ? AND channel_id = ? AND stage != ? AND status = 'done'",
+                    [(run_id, carry_over_from, cid, stage) for cid in channel_ids],
+                )
+        return run_id
+
+    def mark(self, run_id: str, channel_id: str, stage: str, start: date, end: date,
+             status: str = "done", error: str | None = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id, channel_id, stage, start_date, end_date) "
+                "DO UPDATE SET status = excluded.status, error = excluded.error, updated_at = excluded.updated_at",
+                (run_id, channel_id, stage, start.isoformat(), end.isoformat(), status, error, _now()),
+            )
+
+    def finish_run(self, run_id: str, status: str = "finished") -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?", (_now(), status, run_id)
+            )
+
+    # (start, end) of a run, or None if unknown
+    def run_range(self, run_id: str) -> tuple[date, date] | None:
+        row = self._db.execute(
+            "SELECT start_date, end_date FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        return (date.fromisoformat(row[0]), date.fromisoformat(row[1])) if row else None
+
+    # Most recent run that never finished cleanly
+    def last_unfinished_run(self) -> str | None:
+        row = self._db.execute(
+            "SELECT run_id FROM runs WHERE status != 'finished' ORDER BY started_at DESC, rowid DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    # Whether a unit of `stage` finished; with start/end, the one for exactly that range
+    def is_done(self, run_id: str, channel_id: str, stage: str,
+                start: date | None = None, end: date | None = None) -> bool:
+        sql = "SELECT 1 FROM units WHERE run_id = ? AND channel_id = ? AND stage = ? AND status = 'done'"
+        params: tuple = (run_id, channel_id, stage)
+        if start is not None and end is not None:
+            sql += " AND start_date = ? AND end_date = ?"
+            params += (start.isoformat(), end.isoformat())
+        with self._lock:   # called from the channel workers
+            return self._db.execute(sql, params).fetchone() is not None
+
+    # Channels of run_id whose `stage` never completed (failed or still pending)
+    def unfinished_channels(self, run_id: str, stage: str = "ingest") -> list[str]:
+        rows = self._db.execute(
+            "SELECT channel_id FROM units WHERE run_id = ? AND stage = ? AND status != 'done' "
+            "AND channel_id != ? ORDER BY channel_id",
+            (run_id, stage, RUN_SCOPE),
+        ).fetchall()
+        return [r[0] for r in rows]
@@ -1,88 +1,517 @@
-import traceback, sys
+import argparse, logging, os, time, traceback, zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Callable
 from datetime import date, timedelta
-from src.config import ALL_CHANNEL_IDS
-from src.auth import get_public_youtube, get_oauth_services
+from pathlib import Path
+from src.config import ALL_CHANNEL_IDS, PRIORITY_CHANNEL_IDS
+from src.quota import current_channel, quota_stage, get_ledger, plan_run
+from src.journal import RunJournal, RUN_SCOPE
+from src import cache, metrics
+from src.auth import CREDENTIALS, get_public_youtube, get_oauth_services
 from src.fetch import (
     fetch_channel_metadata,
+    fetch_channels_metadata_bulk,
     fetch_upload_playlist_video_ids,
     fetch_video_metadata_bulk,
     fetch_channel_daily_analytics,
-    fetch_video_daily_analytics,
+    fetch_many_video_daily_analytics,
 )
 from src.transform import (
     transform_channel_item,
     transform_video_items,
-    transform_channel_daily_response,
-    transform_video_daily_response,
 )
+from src.columnar import channel_daily_columns, many_video_daily_columns
 from src.db import (
+    fetch_known_video_ids,
+    catalog_complete,
+    set_catalog_complete,
     upsert_channels,
     upsert_videos,
-    upsert_channel_daily,
-    upsert_video_daily,
+    upsert_channel_daily_columns,
+    upsert_video_daily_columns,
     prune_old_video_daily,
+    rollup_video_daily_to_monthly,
+    get_rollup_watermark,
+    create_upcoming_partitions,
+    transaction,
+    UpsertResult,
 )
+from src.pipeline import BatchWriter
+
+log = logging.getLogger("ingest")
 
 #  Helper that ingests ONE channel for ONE day NOTE: CHANGED IT TO TWO DAYS AGO
 YESTERDAY = date.today() - timedelta(days=2)
 
-def ingest_channel(channel_id: str, keep_days: int = 30) -> None:
+# Nightly runs re-ingest this many trailing days to pick up YouTube's late revisions
+REVISIT_DAYS = 3
+# Longest date span per Analytics query; longer ranges are split
+CHUNK_DAYS = 30
+
+# Consecutive (start, end) spans of at most `days` days covering [start, end].
+def _date_chunks(start: date, end: date, days: int = CHUNK_DAYS):
+    while start <= end:
+        stop = min(end, start + timedelta(days=max(1, days) - 1))
+        yield start, stop
+        start = stop + timedelta(days=1)
+
+"""
+Known videos whose metadata is due for a refresh on `day`.
+Each known video lands in exactly one slot, so the whole catalog is refreshed once every refresh_days.
+refresh_days <= 0 disables refreshing known videos.
+"""
+def _refresh_slice(known_ids: set[str], refresh_days: int, day: date) -> list[str]:
+    if refresh_days <= 0:
+        return []
+    slot = day.toordinal() % refresh_days
+    return sorted(v for v in known_ids if zlib.crc32(v.encode()) % refresh_days == slot)
+
+"""
+Ingest one channel: metadata, new videos, and daily analytics for every day in
+[start, end] (default: the nightly window ending YESTERDAY). Each entity gets one
+range query per CHUNK_DAYS span rather than one query per day.
+The uploads playlist is walked until the first stored video only once a walk of
+the channel has reached the end (db.catalog_scans); until then, e.g. on the first
+run after upgrading, after a run that died mid-discovery or was cut by max_pages,
+or with full_scan, the whole playlist is walked.
+Per-video daily stats are only fetched from video_daily_from on: days the
+monthly rollup has already aggregated can't be added to it again, and
+retention would drop them without their ever reaching video_monthly_stats.
+Units of work (discovery, then channel_daily / video_daily per chunk) for which
+unit_done(channel_id, stage, start, end) is true are skipped; unit_finished is
+called with the same arguments once a unit's rows are written.
+"""
+def ingest_channel(
+    channel_id: str,
+    start: date | None = None,
+    end: date | None = None,
+    refresh_days: int = 7,
+    max_pages: int | None = None,
+    raw_channel: dict | None = None,
+    chunk_days: int = CHUNK_DAYS,
+    video_daily_from: date | None = None,
+    full_scan: bool = False,
+    unit_done: Callable[[str, str, date, date], bool] | None = None,
+    unit_finished: Callable[[str, str, date, date], None] | None = None,
+) -> dict[str, UpsertResult]:
+    end = end or YESTERDAY
+    start = start or end - timedelta(days=REVISIT_DAYS - 1)
+    token = current_channel.set(channel_id)
+    t0 = time.perf_counter()
+    try:
+        with metrics.profiled(channel_id):
+            return _ingest_channel(
+                channel_id, start, end, refresh_days, max_pages, raw_channel, chunk_days,
+                video_daily_from, full_scan, unit_done, unit_finished,
+            )
+    finally:
+        metrics.observe("channel_seconds", time.perf_counter() - t0, channel=channel_id)
+        current_channel.reset(token)
+
+def _ingest_channel(
+    channel_id: str,
+    start: date,
+    end: date,
+    refresh_days: int,
+    max_pages: int | None,
+    raw_channel: dict | None,
+    chunk_days: int,
+    video_daily_from: date | None,
+    full_scan: bool,
+    unit_done: Callable[[str, str, date, date], bool] | None,
+    unit_finished: Callable[[str, str, date, date], None] | None,
+) -> dict[str, UpsertResult]:
+    def _done(stage: str, lo: date, hi: date) -> bool:
+        return unit_done is not None and unit_done(channel_id, stage, lo, hi)
+
+    # Journal the unit once the writer has stored everything put before this call
+    def _finished(writer: BatchWriter, stage: str, lo: date, hi: date) -> None:
+        if unit_finished is not None:
+            writer.checkpoint(partial(unit_finished, channel_id, stage, lo, hi))
+
     # Public client (no OAuth needed for Data API calls)
     yt_pub = get_public_youtube()
 
-    # Channel metadata
-    raw_channel = fetch_channel_metadata(yt_pub, channel_id)
-    ch_row = transform_channel_item(raw_channel)
-    if ch_row:
-        upsert_channels([ch_row])
+    # Channel metadata (already fetched and stored by the bulk pre-pass when given)
+    ch_row = None
+    if raw_channel is None:
+        raw_channel = fetch_channel_metadata(yt_pub, channel_id)
+        ch_row = transform_channel_item(raw_channel)
+    if not raw_channel:
+        # Deleted, or a typo in the channel list: fail it rather than report it done
+        raise LookupError(f"channel {channel_id} not found by the Data API")
 
-    # Video discovery & metadata
     uploads_id = raw_channel.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
-    video_ids: list[str] = []
-    if uploads_id:
-        # max_pages=2 -> up to 100 newest uploads each run; adjust if you need deeper scans
-        video_ids = fetch_upload_playlist_video_ids(yt_pub, uploads_id, max_pages=2)
-        if video_ids:
-            raw_video_items = fetch_video_metadata_bulk(yt_pub, video_ids)
-            video_rows = transform_video_items(raw_video_items)
-            upsert_videos(video_rows)
-
-    # OAuth client (Analytics API requires channel-scoped creds)
-    _yt_oauth, analytics = get_oauth_services(channel_id)
-
-    # Channel daily stats (yesterday)
-    raw_ch_daily = fetch_channel_daily_analytics(analytics, channel_id, YESTERDAY, YESTERDAY)
-    ch_daily_rows = transform_channel_daily_response(raw_ch_daily, channel_id)
-    upsert_channel_daily(ch_daily_rows)
-
-    # Per-video daily stats (yesterday)
-    if video_ids:
-        video_daily_rows = []
-        for vid in video_ids:
-            raw_vid_daily = fetch_video_daily_analytics(
-                analytics, channel_id, vid, YESTERDAY, YESTERDAY
-            )
-            video_daily_rows.extend(transform_video_daily_response(raw_vid_daily, vid))
+    known_ids = fetch_known_video_ids(channel_id)
+    # Stopping at the first stored video only finds every new one if the stored
+    # catalog has no gaps; until a walk has reached the end, walk all of it
+    incremental = not full_scan and catalog_complete(channel_id)
+
+    # Every stage below is a generator feeding the writer page by page: rows are
+    # upserted on the writer thread, each batch in its own short transaction,
+    # while the next page is fetched
+    new_ids: list[str] = []
+    counts: dict[str, UpsertResult] = {}
+    if not _done("discovery", start, end):
+        with BatchWriter() as writer:
+            if ch_row:
+                writer.put("channels", upsert_channels, [ch_row])
+
+            # Video discovery & metadata. Only videos not stored yet get metadata, so
+            # a full walk costs one call per 50 known videos
+            walked_all = False
+            if uploads_id:
+                walk = fetch_upload_playlist_video_ids(
+                    yt_pub, uploads_id, stop_after_known=known_ids if incremental else None,
+                    max_pages=max_pages,
+                )
+                while True:
+                    try:
+                        page = next(walk)
+                    except StopIteration as stop:
+                        walked_all = stop.value
+                        break
+                    page = [v for v in page if v not in known_ids]
+                    if not page:
+                        continue
+                    if incremental and not new_ids:
+                        # New videos are stored newest first: if this walk dies before it
+                        # reaches a known video, the next one must not stop at them
+                        set_catalog_complete(channel_id, False)
+                    new_ids.extend(page)
+                    for items in fetch_video_metadata_bulk(yt_pub, page):
+                        writer.put("videos", upsert_videos, transform_video_items(items))
+            # Known ones on a rotating (optional) schedule
+            with quota_stage("refresh"):
+                for items in fetch_video_metadata_bulk(
+                    yt_pub, _refresh_slice(known_ids, refresh_days, YESTERDAY)
+                ):
+                    writer.put("videos", upsert_videos, transform_video_items(items))
+            _finished(writer, "discovery", start, end)
+        counts = writer.counts
+        # Every discovered video is stored now
+        if walked_all:
+            set_catalog_complete(channel_id, True)
+    # (When a resumed run skips discovery, known_ids already holds what it found)
+    video_ids = new_ids + sorted(known_ids)
+
+    with BatchWriter() as writer:
+        # OAuth client (Analytics API requires channel-scoped creds)
+        _yt_oauth, analytics = get_oauth_services(channel_id)
+
+        # Channel and per-video daily stats: one range query per chunk (the transforms
+        # already split multi-day responses by `day`); videos are batched per query too.
+        # Reports go to the loader as typed columns, never as per-row dicts
+        for span_start, span_end in _date_chunks(start, end, chunk_days):
+            if not _done("channel_daily", span_start, span_end):
+                raw_ch_daily = fetch_channel_daily_analytics(analytics, channel_id, span_start, span_end)
+                writer.put("channel_daily_stats", upsert_channel_daily_columns,
+                           channel_daily_columns(raw_ch_daily, channel_id))
+                _finished(writer, "channel_daily", span_start, span_end)
+
+            video_start = max(span_start, video_daily_from or span_start)
+            if video_ids and video_start <= span_end and not _done("video_daily", video_start, span_end):
+                for resp in fetch_many_video_daily_analytics(
+                    analytics, channel_id, video_ids, video_start, span_end
+                ):
+                    writer.put("video_daily_stats", upsert_video_daily_columns,
+                               many_video_daily_columns([resp]))
+                _finished(writer, "video_daily", video_start, span_end)
+    return {**counts, **writer.counts}
+
+
+"""
+Bulk channel metadata for every channel in ceil(N/50) requests, stored with one upsert.
+Returns {channel_id: raw channel item} for the channels the API returned; the
+others are left to ingest_channel, which fetches (and if need be fails) them one
+by one. Any error here only costs the shortcut: it returns {} so that every
+channel fetches its own metadata inside its isolated ingest.
+"""
+def prefetch_channels(channel_ids: list[str]) -> dict[str, dict]:
+    try:
+        raw = fetch_channels_metadata_bulk(get_public_youtube(), channel_ids)
+        rows = [transform_channel_item(item) for item in raw.values()]
+        if rows:
+            upsert_channels(rows)
+    except Exception as e:
+        log.warning("channel metadata pre-pass failed; fetching per channel",
+                    extra={"error": f"{type(e).__name__}: {e}"})
+        return {}
+    return raw
+
+# Run one channel, capturing its traceback instead of letting it escape the worker.
+def _ingest_isolated(channel_id: str, **kwargs) -> tuple[str, str | None, dict]:
+    try:
+        return channel_id, None, ingest_channel(channel_id, **kwargs)
+    except Exception:
+        return channel_id, traceback.format_exc(), {}
+
+"""
+Ingest many channels concurrently on a bounded thread pool.
+One channel's failure never affects the others.
+on_done(channel_id, traceback_or_None) is called on the calling thread as each channel finishes.
+Returns ([(channel_id, traceback), ...], {table: [inserted, updated, skipped]}).
+Extra keyword arguments are passed to ingest_channel; overrides[channel_id] wins over them.
+"""
+def ingest_all(
+    channel_ids: list[str],
+    workers: int = 4,
+    overrides: dict[str, dict] | None = None,
+    on_done: Callable[[str, str | None], None] | None = None,
+    **kwargs
+) -> tuple[list[tuple[str, str]], dict[str, list[int]]]:
+    overrides = overrides or {}
+    failures: list[tuple[str, str]] = []
+    written: dict[str, list[int]] = {}
+    total = len(channel_ids)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [
+            pool.submit(_ingest_isolated, cid, **{**kwargs, **overrides.get(cid, {})})
+            for cid in channel_ids
+        ]
+        for done, fut in enumerate(as_completed(futures), 1):
+            cid, err, counts = fut.result()
+            metrics.inc("channels_total", result="failed" if err else "done")
+            progress = {"channel": cid, "done": done, "total": total}
+            if err:
+                failures.append((cid, err))
+                log.error("channel failed", extra={**progress, "error": err})
+            else:
+                log.info("channel done", extra=progress)
+            if on_done:
+                on_done(cid, err)
+            for table, res in counts.items():
+                acc = written.setdefault(table, [0, 0, 0])
+                for k, n in enumerate(res):
+                    acc[k] += n
+    return failures, written
+
+
+def _iso_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date (YYYY-MM-DD): {value}")
 
-        upsert_video_daily(video_daily_rows)
 
-    # House-keeping: prune old daily rows
-    prune_old_video_daily(retain_days=keep_days)
+"""
+Pick the run to work on: with resume, the last unfinished run (its dates, the
+channels it didn't finish); with rerun_failed, a new run over the channels that
+run didn't finish, carrying over its finished units; otherwise a new run over
+channel_ids from start to end. ValueError when there is no such run.
+"""
+def _select_run(
+    journal: RunJournal,
+    resume: bool,
+    rerun_failed: str | None,
+    start: date,
+    end: date,
+    channel_ids: list[str],
+) -> tuple[str, date, date, list[str]]:
+    if resume:
+        run_id = journal.last_unfinished_run()
+        if not run_id:
+            raise ValueError("no unfinished run to resume")
+        start, end = journal.run_range(run_id)
+        return run_id, start, end, journal.unfinished_channels(run_id)
+    if rerun_failed:
+        rng = journal.run_range(rerun_failed)
+        if not rng:
+            raise ValueError(f"unknown run id {rerun_failed}")
+        start, end = rng
+        channel_ids = journal.unfinished_channels(rerun_failed)
+        return journal.start_run(start, end, channel_ids, carry_over_from=rerun_failed), start, end, channel_ids
+    if start > end:
+        raise ValueError(f"--start {start} is after --end {end}")
+    return journal.start_run(start, end, channel_ids), start, end, channel_ids
 
 
 #  Entry-point
 def main() -> None:
-    for cid in ALL_CHANNEL_IDS:
-        print(f"=== Processing channel {cid} ===")
-        try:
-            ingest_channel(cid)
-            print(f"Done channel {cid}")
-        except Exception as exc:
-            # Log and continue; don't break whole run on one failure
-            print(f"***  Error on channel {cid}: {exc} ***")
-            traceback.print_exc(file=sys.stdout)
-            
-    print("Ingest complete.")
+    p = argparse.ArgumentParser(description="Nightly YouTube ingest for all channels.")
+    p.add_argument("--workers", type=int, default=4,
+                   help="Channels ingested concurrently (1 = sequential); keep <= DB_POOL_SIZE + DB_MAX_OVERFLOW.")
+    p.add_argument("--refresh-days", type=int, default=7,
+                   help="Refresh metadata of known videos once every N days (0 = never).")
+    p.add_argument("--max-pages", type=int, default=None,
+                   help="Cap on uploads-playlist pages walked per channel (default: until a known video, "
+                        "or the end for channels never fully walked). A capped walk is redone in full next run.")
+    p.add_argument("--full-scan", action="store_true",
+                   help="Walk every channel's whole uploads playlist, not just up to the first known video.")
+    p.add_argument("--keep-days", type=int, default=30,
+                   help="Days of video_daily_stats to retain.")
+    p.add_argument("--no-rollup", action="store_true",
+                   help="Skip the monthly rollup stage this run.")
+    p.add_argument("--start", type=_iso_date, default=None,
+                   help="Backfill from this date (YYYY-MM-DD) instead of the nightly window. "
+                        "Per-video stats are only fetched after the monthly rollup watermark; "
+                        "earlier days get channel stats only.")
+    p.add_argument("--end", type=_iso_date, default=None,
+                   help="Last day to ingest (default: two days ago).")
+    p.add_argument("--revisit-days", type=int, default=REVISIT_DAYS,
+                   help="Nightly window: re-ingest this many trailing days for late data revisions.")
+    p.add_argument("--chunk-days", type=int, default=CHUNK_DAYS,
+                   help="Longest date span per Analytics query.")
+    p.add_argument("--resume", action="store_true",
+                   help="Continue the last unfinished run, skipping the channels and date chunks it completed.")
+    p.add_argument("--rerun-failed", metavar="RUN_ID", default=None,
+                   help="New run over only the channels RUN_ID didn't finish (same date range), "
+                        "skipping the date chunks it completed.")
+    p.add_argument("--cache", choices=cache.MODES, default=None,
+                   help="API response cache mode (default: $YT_CACHE_MODE or off).")
+    p.add_argument("--replay", action="store_true",
+                   help="Run transform/db entirely from cached API responses; no network. Same as --cache replay.")
+    p.add_argument("--export-dir", default=os.getenv("PARQUET_EXPORT_DIR"),
+                   help="Write Parquet snapshots of the stats tables here (default: $PARQUET_EXPORT_DIR; unset = no export).")
+    p.add_argument("--export-only-new", action="store_true",
+                   help="Export only partitions with no Parquet file yet, instead of re-exporting this run's dates.")
+    p.add_argument("--metrics-dir", type=Path, default=metrics.METRICS_DIR,
+                   help="Where the run report (run-<id>.json), ingest.prom and profiles go.")
+    p.add_argument("--log-format", choices=("json", "text"), default=metrics.LOG_FORMAT,
+                   help="json: one object per line (default: $YT_LOG_FORMAT or json); text: human-readable.")
+    p.add_argument("--profile", metavar="CHANNEL_ID", action="append", default=[],
+                   help="Profile this channel's ingest (repeatable; adds to $YT_PROFILE_CHANNELS).")
+    args = p.parse_args()
+
+    metrics.configure_logging(args.log_format)
+    metrics.METRICS_DIR = args.metrics_dir
+    metrics.PROFILE_CHANNELS.update(args.profile)
+    run_started = time.perf_counter()
+
+    if args.replay or args.cache:
+        cache.set_mode("replay" if args.replay else args.cache)
+
+    journal = RunJournal()
+    if (args.resume or args.rerun_failed) and (args.start or args.end):
+        p.error("--resume/--rerun-failed reuse the original run's dates; drop --start/--end")
+
+    end = args.end or YESTERDAY
+    start = args.start or end - timedelta(days=max(1, args.revisit_days) - 1)
+    try:
+        run_id, start, end, channel_ids = _select_run(
+            journal, args.resume, args.rerun_failed, start, end, list(ALL_CHANNEL_IDS)
+        )
+    except ValueError as e:
+        p.error(str(e))
+    log.info("run started", extra={"run_id": run_id, "channels": len(channel_ids),
+                                   "start": start, "end": end})
+
+    def _record(cid: str, err: str | None) -> None:
+        journal.mark(run_id, cid, "ingest", start, end,
+                     status="failed" if err else "done", error=err)
+
+    # Date chunks a resumed (or carried-over) run already wrote are not fetched again
+    def _unit_done(cid: str, stage: str, lo: date, hi: date) -> bool:
+        return journal.is_done(run_id, cid, stage, lo, hi)
+
+    def _unit_finished(cid: str, stage: str, lo: date, hi: date) -> None:
+        journal.mark(run_id, cid, stage, lo, hi)
+
+    # Fit the run into today's remaining quota before spending any of it
+    plan = plan_run(channel_ids, priority=PRIORITY_CHANNEL_IDS)
+    deferred = [cid for cid, stages in plan.deferred.items() if "refresh" in stages]
+    log.info("run planned", extra={"channels": len(plan.channels), "projected_quota": plan.projected,
+                                   "skipped": plan.skipped, "refresh_deferred": len(deferred)})
+
+    # Partitions for every date this run may write (one DDL pass, not per channel)
+    create_upcoming_partitions(since=start)
+
+    # Days up to the rollup watermark are already in video_monthly_stats: their
+    # per-video rows could only be pruned again, never rolled up, so don't fetch them
+    rolled_through = get_rollup_watermark()
+    video_daily_from = rolled_through + timedelta(days=1) if rolled_through else None
+    if video_daily_from and start < video_daily_from:
+        log.warning("per-video stats start after the rollup watermark",
+                    extra={"start": start, "video_daily_from": video_daily_from})
+
+    # Refresh every token that would expire mid-run now, in parallel, rather than
+    # one by one inside the channel workers
+    for cid, err in CREDENTIALS.refresh_due(plan.channels).items():
+        log.warning("token refresh failed", extra={"channel": cid, "error": err})
+
+    ledger = get_ledger()
+    try:
+        # Channel metadata pre-pass; uploads playlists are handed to each channel's ingest
+        raw_channels = prefetch_channels(plan.channels)
+        overrides = {cid: {"raw_channel": raw_channels.get(cid)} for cid in plan.channels}
+        for cid in deferred:
+            overrides[cid]["refresh_days"] = 0
+
+        failures, written = ingest_all(
+            plan.channels,
+            workers=args.workers,
+            overrides=overrides,
+            on_done=_record,
+            start=start,
+            end=end,
+            chunk_days=args.chunk_days,
+            refresh_days=args.refresh_days,
+            max_pages=args.max_pages,
+            full_scan=args.full_scan,
+            video_daily_from=video_daily_from,
+            unit_done=_unit_done,
+            unit_finished=_unit_finished,
+        )
+    finally:
+        ledger.save()
+        # Tokens the clients refreshed on their own during the run
+        CREDENTIALS.persist_changed()
+
+    # Parquet export of the days this run wrote (or of every day not yet on disk),
+    # before retention below can drop their partitions
+    if args.export_dir:
+        from src import export  # pyarrow is only needed when exporting
+        if not journal.is_done(run_id, RUN_SCOPE, "export-daily"):
+            exported = export.export_daily(
+                args.export_dir, since=None if args.export_only_new else start,
+                only_new=args.export_only_new,
+            )
+            log.info("exported daily partitions", extra={"partitions": {t: len(v) for t, v in exported.items()}})
+            journal.mark(run_id, RUN_SCOPE, "export-daily", start, end)
+
+    # House-keeping (once per run): roll closed days into monthly stats, then
+    # drop expired daily partitions; atomic together
+    if not journal.is_done(run_id, RUN_SCOPE, "housekeeping"):
+        with transaction() as conn:
+            if not args.no_rollup:
+                rollup_video_daily_to_monthly(retain_days=args.keep_days, conn=conn)
+            prune_old_video_daily(retain_days=args.keep_days, conn=conn)
+        journal.mark(run_id, RUN_SCOPE, "housekeeping", start, end)
+
+    # Monthly rows change only in months the rollup touched: those from the
+    # watermark it started at on
+    if args.export_dir and not journal.is_done(run_id, RUN_SCOPE, "export-monthly"):
+        since = None
+        if rolled_through is not None and not args.export_only_new:
+            since = rolled_through.replace(day=1)
+        exported = export.export_monthly(args.export_dir, since=since, only_new=args.export_only_new)
+        log.info("exported monthly partitions", extra={"partitions": {t: len(v) for t, v in exported.items()}})
+        journal.mark(run_id, RUN_SCOPE, "export-monthly", start, end)
+
+    unfinished = journal.unfinished_channels(run_id)
+    journal.finish_run(run_id, status="partial" if unfinished else "finished")
+
+    # Run report: outcome plus every counter and timer (per-stage, per-channel
+    # seconds, API calls, retries, rows), and the same numbers for Prometheus
+    summary = {
+        "run_id": run_id,
+        "start": start,
+        "end": end,
+        "seconds": round(time.perf_counter() - run_started, 3),
+        "succeeded": len(plan.channels) - len(failures),
+        "failed": [cid for cid, _err in failures],
+        "skipped": plan.skipped,
+        "unfinished": unfinished,
+        "rows": {t: dict(zip(("inserted", "updated", "unchanged"), n)) for t, n in sorted(written.items())},
+        "quota_used_today": {api: ledger.used_today(api) for api in ("youtube", "youtubeAnalytics")},
+    }
+    report = metrics.write_report(args.metrics_dir / f"run-{run_id}.json", **summary)
+    metrics.write_prometheus(args.metrics_dir / "ingest.prom")
+    log.info("run complete", extra={**summary, "report": str(report)})
+    if unfinished:
+        log.warning(f"{len(unfinished)} channels unfinished; re-run them with --rerun-failed {run_id}",
+                    extra={"run_id": run_id})
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,248 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from datetime import datetime, timezone
+from pathlib import Path
+from src.config import STATE_DIR
+from src.quota import current_channel
+
+METRICS_DIR = Path(os.getenv("YT_METRICS_DIR", STATE_DIR / "metrics"))
+PROM_PREFIX = "yt_ingest_"
+LOG_FORMAT = os.getenv("YT_LOG_FORMAT", "json")   # json | text
+LOG_LEVEL = os.getenv("YT_LOG_LEVEL", "INFO")
+
+# Channels to run under the profiler (comma-separated), see profiled()
+PROFILE_CHANNELS = {c for c in os.getenv("YT_PROFILE_CHANNELS", "").split(",") if c}
+
+Labels = tuple[tuple[str, str], ...]
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+"""
+Process-wide counters and timers, keyed by name plus labels.
+Counters only go up; a timer keeps count / total / max seconds.
+"""
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.timers: dict[str, dict[Labels, list[float]]] = defaultdict(dict)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self.counters[name][key] += value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            t = self.timers[name].setdefault(key, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+                    for name, series in sorted(self.counters.items())
+                },
+                "timers": {
+                    name: [{"labels": dict(k), "count": c, "seconds": round(s, 6), "max": round(m, 6)}
+                           for k, (c, s, m) in sorted(series.items())]
+                    for name, series in sorted(self.timers.items())
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+REGISTRY = Registry()
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    REGISTRY.inc(name, value, **labels)
+
+def observe(name: str, seconds: float, **labels) -> None:
+    REGISTRY.observe(name, seconds, **labels)
+
+@contextmanager
+def timer(name: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - t0, **labels)
+
+# Wall time the current channel spent in `stage` (playlist, analytics, db_write, ...)
+def stage_time(stage: str, seconds: float) -> None:
+    REGISTRY.observe("channel_stage_seconds", seconds, channel=current_channel.get(), stage=stage)
+
+# Decorator: time every call as `name`{function=...}, and as `stage` of the current channel if given.
+def timed(name: str, stage: str | None = None):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                REGISTRY.observe(name, elapsed, function=fn.__name__)
+                if stage:
+                    stage_time(stage, elapsed)
+        return wrapper
+    return deco
+
+
+# Reports
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    tmp.replace(path)
+
+"""
+Write the run report: `extra` (run id, dates, outcome, ...) plus every counter
+and timer, as JSON. Returns the path written.
+"""
+def write_report(path: Path, **extra) -> Path:
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **extra,
+        **REGISTRY.snapshot(),
+    }
+    _atomic_write(path, json.dumps(report, indent=1, sort_keys=True, default=str))
+    return path
+
+def _prom_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+    return "{" + body + "}"
+
+# Counters and timers in the Prometheus text format (node_exporter textfile collector).
+def prometheus_text() -> str:
+    lines = []
+    with REGISTRY._lock:
+        for name, series in sorted(REGISTRY.counters.items()):
+            metric = PROM_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            lines += [f"{metric}{_prom_labels(k)} {v:g}" for k, v in sorted(series.items())]
+        for name, series in sorted(REGISTRY.timers.items()):
+            metric = PROM_PREFIX + name
+            lines.append(f"# TYPE {metric} summary")
+            for k, (count, total, _max) in sorted(series.items()):
+                lines.append(f"{metric}_count{_prom_labels(k)} {count}")
+                lines.append(f"{metric}_sum{_prom_labels(k)} {total:.6f}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: Path) -> Path:
+    _atomic_write(path, prometheus_text())
+    return path
+
+
+# Structured logging
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _STD_ATTRS}
+
+# One JSON object per line: ts, level, logger, msg, plus any `extra=` fields.
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        out.update(_extras(record))
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+# Human-readable line with the `extra=` fields appended as key=value.
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{k}={v}" for k, v in _extras(record).items() if k != "error")
+        if fields:
+            line = f"{line} {fields}"
+        if "error" in vars(record):
+            line = f"{line}\n{record.error}"
+        return line
+
+def configure_logging(fmt: str = LOG_FORMAT, level: str = LOG_LEVEL) -> None:
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+# One profile at a time: cProfile cannot run in two threads at once on Python 3.12+
+_profile_lock = threading.Lock()
+_profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+"""
+Profile the enclosed block when channel_id is in PROFILE_CHANNELS. Uses the
+pyinstrument sampling profiler if it is installed (HTML report), else cProfile
+(.pstats, deterministic and slower). Output goes to METRICS_DIR.
+Profiled channels run one after another; other channels are not held up. Both
+profilers only see the calling thread, so code that would hand work to another
+thread (pipeline.BatchWriter) checks profiling() and does it inline instead.
+"""
+@contextmanager
+def profiled(channel_id: str):
+    if channel_id not in PROFILE_CHANNELS:
+        yield
+        return
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    with _profile_lock:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        token = _profiling.set(True)
+        try:
+            if Profiler is not None:
+                profiler = Profiler(interval=0.005)
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    (METRICS_DIR / f"profile-{channel_id}-{stamp}.html").write_text(profiler.output_html())
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    profiler.dump_stats(str(METRICS_DIR / f"profile-{channel_id}-{stamp}.pstats"))
+        finally:
+            _profiling.reset(token)
+
+# True inside a profiled() block
+def profiling() -> bool:
+    return _profiling.get()
@@ -0,0 +1,156 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple, Sequence
+from src import columnar, metrics
+from src.db import UpsertResult
+
+# Most rows buffered per table before one upsert call. The writer also flushes
+# whenever it has caught up with the producer, so batches only grow this large
+# when writes are slower than fetches.
+WRITE_BATCH_ROWS = int(os.getenv("YT_WRITE_BATCH_ROWS", "5000"))
+# Batches waiting for the writer; producers block once this many are queued
+WRITE_QUEUE_DEPTH = int(os.getenv("YT_WRITE_QUEUE_DEPTH", "8"))
+
+_FLUSH = object()   # producer finished: write what's buffered
+
+# Queued by checkpoint(): write everything before it, then call fn
+class _Checkpoint(NamedTuple):
+    fn: Callable[[], None]
+
+Upsert = Callable[..., UpsertResult]
+Batch = Sequence[dict] | columnar.Columns
+
+"""
+Writes one channel's rows on a background thread while the caller keeps fetching.
+put() hands transformed rows over a bounded queue, so a fast fetcher blocks
+instead of piling rows up in memory; the writer groups them per table and calls
+the upsert once batch_rows rows are buffered or the queue runs empty (it has
+caught up), whichever comes first. Each upsert is its own short transaction:
+no connection is held while the caller waits on the network.
+A table is fed either row dicts or columnar.Columns, never both (TypeError).
+
+    with BatchWriter() as writer:
+        writer.put("videos", upsert_videos, rows)
+
+Leaving the block waits for the last batch, also when the caller failed, so
+rows whose quota was already spent are kept. A write error is re-raised from
+the next put() or on exit. checkpoint(fn) calls fn once every row put before it
+is written (e.g. to journal a finished unit); after a write error it never is.
+The writer runs in a copy of the caller's context, so its writes are booked to
+the caller's channel (quota.current_channel). Inside metrics.profiled() there is
+no thread: put() writes full batches itself and the rest is written on exit.
+"""
+class BatchWriter:
+    def __init__(self, batch_rows: int = WRITE_BATCH_ROWS, depth: int = WRITE_QUEUE_DEPTH):
+        self.batch_rows = max(1, batch_rows)
+        self.counts: dict[str, UpsertResult] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        self._buffers: dict[str, tuple[Upsert, list[Batch], int]] = {}
+        self._columnar: dict[str, bool] = {}   # per table: fed Columns (True) or row dicts
+        self._error: BaseException | None = None
+        # Under the profiler, write on the caller's thread so the profile includes the writes
+        self._thread = None if metrics.profiling() else threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run,), name="batch-writer", daemon=True)
+
+    def __enter__(self) -> "BatchWriter":
+        if self._thread is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._thread is None:
+            if self._error is None:
+                self._guarded(self._flush_all)
+        else:
+            self._queue.put(_FLUSH)
+            self._thread.join()
+        if exc_type is None and self._error is not None:
+            raise self._error
+
+    def put(self, table: str, upsert: Upsert, rows: Batch) -> None:
+        if self._error is not None:
+            raise self._error
+        if not _size(rows):
+            return
+        columnar_rows = columnar.is_columns(rows)
+        if self._columnar.setdefault(table, columnar_rows) != columnar_rows:
+            raise TypeError(f"{table}: cannot mix row dicts and Columns in one BatchWriter")
+        if self._thread is None:
+            self._guarded(lambda: self._add(table, upsert, rows))
+            if self._error is not None:
+                raise self._error
+        else:
+            t0 = time.perf_counter()
+            self._queue.put((table, upsert, rows))
+            metrics.observe("write_queue_wait_seconds", time.perf_counter() - t0)
+
+    def checkpoint(self, fn: Callable[[], None]) -> None:
+        if self._error is not None:
+            raise self._error
+        if self._thread is None:
+            self._guarded(lambda: self._checkpoint(fn))
+            if self._error is not None:
+                raise self._error
+        else:
+            self._queue.put(_Checkpoint(fn))
+
+    def _checkpoint(self, fn: Callable[[], None]) -> None:
+        self._flush_all()
+        fn()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _FLUSH:
+                if self._error is None:
+                    self._guarded(self._flush_all)
+                return
+            if self._error is not None:
+                continue  # keep draining so producers never block on a dead writer
+            if isinstance(item, _Checkpoint):
+                self._guarded(lambda: self._checkpoint(item.fn))
+                continue
+            table, upsert, rows = item
+            self._guarded(lambda: self._add(table, upsert, rows))
+            # Caught up with the producer: write now rather than wait for a full batch
+            if self._error is None and self._queue.empty():
+                self._guarded(self._flush_all)
+
+    def _guarded(self, fn) -> None:
+        try:
+            fn()
+        except BaseException as e:
+            self._error = e
+
+    def _add(self, table: str, upsert: Upsert, rows: Batch) -> None:
+        _fn, parts, n = self._buffers.get(table, (upsert, [], 0))
+        parts.append(rows)
+        n += _size(rows)
+        self._buffers[table] = (upsert, parts, n)
+        if n >= self.batch_rows:
+            self._flush(table)
+
+    def _flush(self, table: str) -> None:
+        upsert, parts, n = self._buffers[table]
+        if not n:
+            return
+        if columnar.is_columns(parts[0]):
+            batch = columnar.concat(parts)
+        else:
+            batch = [r for part in parts for r in part]
+        res = upsert(batch)
+        prev = self.counts.get(table)
+        self.counts[table] = UpsertResult(*(a + b for a, b in zip(prev, res))) if prev else res
+        self._buffers[table] = (upsert, [], 0)
+
+    # In arrival order, so tables are written in the order the caller produced them
+    def _flush_all(self) -> None:
+        for table in list(self._buffers):
+            self._flush(table)
+
+
+def _size(rows: Batch) -> int:
+    return columnar.num_rows(rows) if columnar.is_columns(rows) else len(rows)
@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Sequence
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from src.config import STATE_DIR
+
+# Quota units per call for every endpoint used in src/fetch.py.
+# The Analytics API has its own pool, counted here as one unit per query.
+ENDPOINT_COSTS = {
+    ("youtube", "channels.list"): 1,
+    ("youtube", "playlistItems.list"): 1,
+    ("youtube", "videos.list"): 1,
+    ("youtubeAnalytics", "reports.query"): 1,
+}
+
+# Daily budgets per API; 0 means "don't plan against this API".
+DAILY_BUDGETS = {
+    "youtube": int(os.getenv("YT_DATA_DAILY_QUOTA", "10000")),
+    "youtubeAnalytics": int(os.getenv("YT_ANALYTICS_DAILY_QUOTA", "0")),
+}
+
+# Stages ingest_channel can skip when the budget is tight.
+OPTIONAL_STAGES = ("refresh",)
+
+# Estimate for a channel with no recorded history.
+DEFAULT_CHANNEL_ESTIMATE = {"core": {"youtube": 5, "youtubeAnalytics": 2}}
+
+QUOTA_FILE = STATE_DIR / "quota.json"
+KEEP_DAYS = 30
+
+# Attribution of calls made on this thread to a channel / stage
+current_channel: ContextVar[str | None] = ContextVar("current_channel", default=None)
+current_stage: ContextVar[str] = ContextVar("current_stage", default="core")
+
+# Google resets the daily quota at midnight Pacific time.
+def quota_day() -> str:
+    return datetime.now(ZoneInfo("America/Los_Angeles")).date().isoformat()
+
+@contextmanager
+def quota_stage(name: str):
+    token = current_stage.set(name)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+
+"""
+Records quota units spent by this run (per API, per channel and stage) on top of
+the persisted daily totals. save() writes the daily totals plus this run's
+per-channel usage, which plan_run uses as the next run's estimates.
+"""
+class QuotaLedger:
+    def __init__(self, path=QUOTA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.run_units: dict[str, int] = defaultdict(int)
+        self.by_channel: dict[str, dict[str, dict[str, int]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(int))
+        )
+        self._state = {"daily": {}, "channels": {}}
+        if path.exists():
+            self._state.update(json.loads(path.read_text()))
+
+    def charge(self, api: str, endpoint: str, units: int | None = None) -> None:
+        if units is None:
+            units = ENDPOINT_COSTS.get((api, endpoint), 1)
+        channel = current_channel.get()
+        with self._lock:
+            self.run_units[api] += units
+            if channel:
+                self.by_channel[channel][current_stage.get()][api] += units
+
+    def used_today(self, api: str) -> int:
+        with self._lock:
+            saved = self._state["daily"].get(quota_day(), {}).get(api, 0)
+            return saved + self.run_units[api]
+
+    # Per-stage units recorded for channel_id by the last run that touched it.
+    def estimate(self, channel_id: str) -> dict[str, dict[str, int]]:
+        return self._state["channels"].get(channel_id) or DEFAULT_CHANNEL_ESTIMATE
+
+    def save(self) -> None:
+        with self._lock:
+            day = quota_day()
+            daily = self._state["daily"].setdefault(day, {})
+            for api, units in self.run_units.items():
+                daily[api] = daily.get(api, 0) + units
+            self.run_units.clear()
+            for day_key in sorted(self._state["daily"])[:-KEEP_DAYS]:
+                del self._state["daily"][day_key]
+
+            channels = self._state["channels"]
+            for cid, stages in self.by_channel.items():
+                channels[cid] = {s: dict(apis) for s, apis in stages.items()}
+            self.by_channel.clear()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(self._state, indent=1, sort_keys=True))
+            tmp.replace(self.path)
+
+_ledger: QuotaLedger | None = None
+_ledger_lock = threading.Lock()
+
+def get_ledger() -> QuotaLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = QuotaLedger()
+        return _ledger
+
+
+# Run planning
+@dataclass
+class RunPlan:
+    channels: list[str]                                        # run order
+    deferred: dict[str, set[str]] = field(default_factory=dict)  # channel -> optional stages skipped
+    skipped: list[str] = field(default_factory=list)           # no budget left even for required stages
+    projected: dict[str, int] = field(default_factory=dict)    # API -> units used after this run
+
+def _sum_stages(stages: dict[str, dict[str, int]], optional: bool) -> dict[str, int]:
+    total: dict[str, int] = defaultdict(int)
+    for stage, apis in stages.items():
+        if (stage in OPTIONAL_STAGES) == optional:
+            for api, units in apis.items():
+                total[api] += units
+    return total
+
+"""
+Order channels priority-first and fit them into what is left of today's budgets.
+Required stages are reserved for every channel first (in run order); optional
+stages then get whatever remains, again in run order.
+"""
+def plan_run(
+    channel_ids: list[str],
+    priority: Sequence[str] = (),
+    ledger: QuotaLedger | None = None,
+    budgets: dict[str, int] | None = None
+) -> RunPlan:
+    ledger = ledger or get_ledger()
+    budgets = DAILY_BUDGETS if budgets is None else budgets
+    remaining = {api: b - ledger.used_today(api) for api, b in budgets.items() if b > 0}
+
+    prio = set(priority)
+    ordered = [c for c in channel_ids if c in prio] + [c for c in channel_ids if c not in prio]
+
+    def _fits(cost: dict[str, int]) -> bool:
+        return all(remaining.get(api, units) >= units for api, units in cost.items())
+
+    def _take(cost: dict[str, int]) -> None:
+        for api, units in cost.items():
+            if api in remaining:
+                remaining[api] -= units
+
+    plan = RunPlan(channels=[])
+    for cid in ordered:
+        required = _sum_stages(ledger.estimate(cid), optional=False)
+        if _fits(required):
+            _take(required)
+            plan.channels.append(cid)
+        else:
+            plan.skipped.append(cid)
+
+    for cid in plan.channels:
+        est = ledger.estimate(cid)
+        optional = _sum_stages(est, optional=True)
+        if _fits(optional):
+            _take(optional)
+        else:
+            plan.deferred[cid] = {s for s in OPTIONAL_STAGES if s in est}
+
+    plan.projected = {api: budgets[api] - left for api, left in remaining.items()}
+    return plan
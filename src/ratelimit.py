@@ -0,0 +1,239 @@
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from googleapiclient.errors import HttpError
+from src import metrics
+from src.quota import quota_day
+
+# Requests per second: one bucket per API (process-wide) and one per credential.
+API_RATES = {
+    "youtube": float(os.getenv("YT_DATA_QPS", "20")),
+    "youtubeAnalytics": float(os.getenv("YT_ANALYTICS_QPS", "10")),
+}
+CREDENTIAL_RATE = float(os.getenv("YT_CREDENTIAL_QPS", "5"))
+
+# AIMD bounds on in-flight requests per API
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = int(os.getenv("YT_MAX_CONCURRENCY", "16"))
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# 403 reasons meaning "slow down" vs. "nothing left today"
+THROTTLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class QuotaExhaustedError(RuntimeError):
+    """The API's daily quota is gone; the breaker fails further calls fast until it resets."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    # Drain the bucket so every caller waits at least `seconds` (honours Retry-After)
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+"""
+Additive-increase / multiplicative-decrease cap on in-flight requests.
+Each success grows the limit by 1/limit; each throttle response halves it.
+"""
+class AdaptiveConcurrency:
+    def __init__(self, initial: int = 4):
+        self.limit = float(min(max(initial, MIN_CONCURRENCY), MAX_CONCURRENCY))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(MAX_CONCURRENCY, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self.limit = max(MIN_CONCURRENCY, self.limit / 2)
+
+
+"""
+Opens once an API reports its quota exhausted. On a later quota day (the quota
+resets at midnight Pacific) it half-opens: one probe call goes through while the
+rest still fail fast. Any answer but quota exhaustion closes it; another quota
+error re-opens it until the next day.
+"""
+class CircuitBreaker:
+    def __init__(self):
+        self.open_reason: str | None = None
+        self.opened_day: str | None = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def check(self, api: str) -> None:
+        with self._lock:
+            if not self.open_reason:
+                return
+            if self.opened_day != quota_day() and not self.probing:
+                self.probing = True
+                return
+        raise QuotaExhaustedError(f"{api} quota exhausted ({self.open_reason}); not calling")
+
+    def trip(self, reason: str) -> None:
+        with self._lock:
+            self.open_reason = reason
+            self.opened_day = quota_day()
+            self.probing = False
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.open_reason = self.opened_day = None
+            self.probing = False
+
+    # The probe ended without an answer (retry, connection error): the next call probes
+    def release(self) -> None:
+        with self._lock:
+            self.probing = False
+
+
+_lock = threading.Lock()
+_api_buckets: dict[str, TokenBucket] = {}
+_credential_buckets: dict[tuple[str, str], TokenBucket] = {}
+_concurrency: dict[str, AdaptiveConcurrency] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+
+def _state(api: str, credential: str):
+    with _lock:
+        if api not in _api_buckets:
+            _api_buckets[api] = TokenBucket(API_RATES.get(api, 10.0))
+            _concurrency[api] = AdaptiveConcurrency()
+            _breakers[api] = CircuitBreaker()
+        key = (api, credential)
+        if key not in _credential_buckets:
+            _credential_buckets[key] = TokenBucket(CREDENTIAL_RATE)
+        return _api_buckets[api], _credential_buckets[key], _concurrency[api], _breakers[api]
+
+
+def _error_reason(e: HttpError) -> str | None:
+    try:
+        body = json.loads(e.content.decode("utf-8") if isinstance(e.content, bytes) else e.content)
+        return body["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+# Seconds requested by a Retry-After header (delta-seconds or HTTP date), else None.
+def _retry_after(e: HttpError) -> float | None:
+    resp = getattr(e, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+# Full-jitter exponential backoff
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+"""
+Run fn() (one API request) under the limiters for api/credential.
+Throttling (429, 403 rate-limit reasons) and 5xx are retried with jittered
+backoff or Retry-After and shrink the API's concurrency; quota exhaustion trips
+the API's circuit breaker (see CircuitBreaker) and raises QuotaExhaustedError.
+Anything else is raised as-is.
+"""
+def call(api: str, credential: str, fn):
+    api_bucket, cred_bucket, concurrency, breaker = _state(api, credential)
+    attempt = 0
+    while True:
+        breaker.check(api)
+        api_bucket.acquire()
+        cred_bucket.acquire()
+        try:
+            with concurrency.slot():
+                result = fn()
+        except HttpError as e:
+            status = getattr(e, "resp", None).status if getattr(e, "resp", None) else None
+            reason = _error_reason(e)
+            if reason in QUOTA_REASONS:
+                metrics.inc("api_quota_exhausted_total", api=api, reason=reason)
+                breaker.trip(reason)
+                raise QuotaExhaustedError(f"{api} quota exhausted ({reason})") from e
+            throttled = status == 429 or (status == 403 and reason in THROTTLE_REASONS)
+            if not (throttled or (status is not None and status >= 500)):
+                breaker.on_success()   # an answer: the quota isn't what failed
+                metrics.inc("api_errors_total", api=api, status=status)
+                raise
+            breaker.release()
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS:
+                metrics.inc("api_errors_total", api=api, status=status)
+                raise
+            metrics.inc("api_retries_total", api=api, reason="throttled" if throttled else "server_error")
+            concurrency.on_throttle()
+            delay = _retry_after(e)
+            if delay is None:
+                delay = _backoff(attempt)
+            else:
+                api_bucket.pause(delay)
+            time.sleep(delay)
+        except (TimeoutError, ConnectionError):
+            breaker.release()
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS:
+                metrics.inc("api_errors_total", api=api, status="connection")
+                raise
+            metrics.inc("api_retries_total", api=api, reason="connection")
+            time.sleep(_backoff(attempt))
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            concurrency.on_success()
+            breaker.on_success()
+            return result
@@ -1,7 +1,12 @@
 import argparse
 import time
-from src.auth import ensure_channel_token, get_public_youtube, TOKENS_DIR
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.auth import (
+    CREDENTIALS, REFRESH_WORKERS, TOKENS_DIR,
+    check_channel_token, ensure_channel_token, get_public_youtube,
+)
 from src.config import ALL_CHANNEL_IDS
+from src.fetch import fetch_channels_metadata_bulk
 
 def _title_for(yt_pub, cid: str) -> str:
     try:
@@ -10,17 +15,39 @@ def _title_for(yt_pub, cid: str) -> str:
     except Exception:
         return cid
 
-def main():
-    p = argparse.ArgumentParser(description="Mint/refresh OAuth tokens for all Brand Channels.")
-    p.add_argument("--force", action="store_true",
-                   help="Force re-consent for every channel (use sparingly).")
-    p.add_argument("--sleep", type=float, default=0.5,
-                   help="Delay between channels (seconds).")
-    args = p.parse_args()
+# Titles for every channel in ceil(N/50) requests; falls back to the IDs.
+def _titles(yt_pub, channel_ids: list[str]) -> dict[str, str]:
+    try:
+        items = fetch_channels_metadata_bulk(yt_pub, channel_ids)
+    except Exception:
+        items = {}
+    return {cid: items.get(cid, {}).get("snippet", {}).get("title", cid) for cid in channel_ids}
 
-    yt_pub = get_public_youtube()
-    print(f"Tokens directory: {TOKENS_DIR.resolve()}")
+"""
+Automated pass: check (and refresh) every channel's token concurrently, with no
+prompts. Returns ({channel_id: reason} needing re-consent, {channel_id: error}
+for checks that failed for other reasons, e.g. network).
+"""
+def _check_all(channel_ids: list[str], workers: int, rotate: bool) -> tuple[dict[str, str], dict[str, str]]:
+    needs_consent: dict[str, str] = {}
+    errors: dict[str, str] = {}
+
+    def _one(cid: str) -> tuple[str, str | None, str | None]:
+        try:
+            return cid, check_channel_token(cid, force_refresh=rotate), None
+        except Exception as e:
+            return cid, None, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for fut in as_completed([pool.submit(_one, cid) for cid in channel_ids]):
+            cid, reason, err = fut.result()
+            if reason:
+                needs_consent[cid] = reason
+            elif err:
+                errors[cid] = err
+    return needs_consent, errors
 
+def _serial(args, yt_pub) -> tuple[list, list]:
     successes, failures = [], []
     total = len(ALL_CHANNEL_IDS)
 
@@ -35,6 +62,62 @@ def main():
             print(f"NONO Failed -> {e}")
             failures.append((cid, str(e)))
         time.sleep(args.sleep)
+    return successes, failures
+
+def _checked(args, yt_pub) -> tuple[list, list]:
+    channel_ids = list(ALL_CHANNEL_IDS)
+    titles = _titles(yt_pub, channel_ids)
+
+    t0 = time.perf_counter()
+    needs_consent, errors = _check_all(channel_ids, args.workers, args.rotate)
+    ok = [cid for cid in channel_ids if cid not in needs_consent and cid not in errors]
+    print(f"Checked {len(channel_ids)} tokens in {time.perf_counter() - t0:.1f}s: "
+          f"{len(ok)} ok, {len(needs_consent)} need consent, {len(errors)} errors")
+    CREDENTIALS.persist_changed()
+
+    failures = [(cid, err) for cid, err in errors.items()]
+    pending = [cid for cid in channel_ids if cid in needs_consent]
+    if pending and args.no_consent:
+        for cid in pending:
+            print(f"   - {titles[cid]} ({cid}): {needs_consent[cid]}")
+        return ok, failures + [(cid, needs_consent[cid]) for cid in pending]
+
+    # Interactive consent only for the channels that need it
+    successes = list(ok)
+    for i, cid in enumerate(pending, 1):
+        print(f"\n[{i}/{len(pending)}] {titles[cid]} ({cid}): {needs_consent[cid]}")
+        try:
+            path = ensure_channel_token(cid, force_reauth=True)
+            print(f"YESYES Saved token -> {path}")
+            successes.append(cid)
+        except Exception as e:
+            print(f"NONO Failed -> {e}")
+            failures.append((cid, str(e)))
+    return successes, failures
+
+def main():
+    p = argparse.ArgumentParser(description="Mint/refresh OAuth tokens for all Brand Channels.")
+    p.add_argument("--force", action="store_true",
+                   help="Force re-consent for every channel (use sparingly).")
+    p.add_argument("--sleep", type=float, default=0.5,
+                   help="Delay between channels (seconds).")
+    p.add_argument("--check", action="store_true",
+                   help="Check/refresh every token concurrently without prompting, then run "
+                        "consent only for the channels that need it.")
+    p.add_argument("--workers", type=int, default=REFRESH_WORKERS,
+                   help="--check: tokens checked concurrently.")
+    p.add_argument("--rotate", action="store_true",
+                   help="--check: refresh every token, not only those close to expiry.")
+    p.add_argument("--no-consent", action="store_true",
+                   help="--check: only report the channels needing consent; never open the browser.")
+    args = p.parse_args()
+    if args.check and args.force:
+        p.error("--check and --force are exclusive")
+
+    yt_pub = get_public_youtube()
+    print(f"Tokens directory: {TOKENS_DIR.resolve()}")
+
+    successes, failures = (_checked if args.check else _serial)(args, yt_pub)
 
     print("\nSummary:")
     print(f"  Success: {len(successes)}")
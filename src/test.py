@@ -21,14 +21,14 @@ def test_single_channel(channel_id: str):
     uploads_id = ch_meta["contentDetails"]["relatedPlaylists"]["uploads"]
 
     # Playlist (video IDs)
-    video_ids = fetch_upload_playlist_video_ids(yt_pub, uploads_id, max_pages=1)
+    video_ids = next(fetch_upload_playlist_video_ids(yt_pub, uploads_id, max_pages=1), [])
     if not video_ids:
         print(f"[{channel_id}] No uploads yet (empty uploads playlist).")
     else:
         print(f"[{channel_id}] Fetched {len(video_ids)} video IDs (first page). First few: {video_ids[:5]}")
 
         # Bulk video metadata (limit to 10 for test)
-        meta_items = fetch_video_metadata_bulk(yt_pub, video_ids[:10])
+        meta_items = [it for page in fetch_video_metadata_bulk(yt_pub, video_ids[:10]) for it in page]
         print(f"[{channel_id}] Got metadata for {len(meta_items)} videos.")
         if meta_items:
             sample = meta_items[0]
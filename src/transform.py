@@ -1,6 +1,10 @@
 from __future__ import annotations
 from datetime import datetime, date
 from typing import List, Sequence, Optional
+from src.columnar import (
+    channel_daily_columns, video_daily_columns, many_video_daily_columns, to_rows,
+)
+from src.metrics import timed
 
 
 # Helpers: ISO 8601 parsing
@@ -80,6 +84,7 @@ Each raw item contains:
     id, snippet{title, description, tags, publishedAt, thumbnails}, statistics{...}
 For initial load we do not store counts here (they go to daily stats).
 """
+@timed("transform_seconds", stage="transform")
 def transform_video_items(video_items: List[dict]) -> List[dict]:
     rows: List[dict] = []
     for item in video_items:
@@ -105,52 +110,11 @@ def transform_video_items(video_items: List[dict]) -> List[dict]:
 # Channel Daily Analytics
 """
 Convert a raw analytics response (channel daily) into list of row dicts for channel_daily_stats table.
-Expected columns order (dimensions=day): date, views, subscribersGained, subscribersLost, estimatedMinutesWatched
-We do a defensive mapping using columnHeaders to avoid relying purely on order.
+Columns are located by name via columnHeaders rather than relying on order.
+Thin wrapper over src/columnar.py; loaders should prefer channel_daily_columns.
 """
 def transform_channel_daily_response(resp: dict, channel_id: str) -> List[dict]:
-    
-    if not resp or not resp.get("rows"):
-        return []
-
-    headers = resp.get("columnHeaders", [])
-    # Build name->index mapping
-    idx_map = {h["name"]: i for i, h in enumerate(headers)}
-
-    rows_out: List[dict] = []
-    for raw_row in resp["rows"]:
-        # dimension 'day' is always first if included
-        day_str = raw_row[idx_map.get("day", 0)]
-        day_d = _parse_iso_date(day_str)
-
-        def _get_int(name: str) -> int:
-            idx = idx_map.get(name)
-            if idx is None:
-                return 0
-            try:
-                return int(raw_row[idx])
-            except (TypeError, ValueError):
-                return 0
-
-        def _get_float(name: str) -> float:
-            idx = idx_map.get(name)
-            if idx is None:
-                return 0.0
-            try:
-                return float(raw_row[idx])
-            except (TypeError, ValueError):
-                return 0.0
-
-        rows_out.append({
-            "channel_id": channel_id,
-            "date": day_d,
-            "views": _get_int("views"),
-            "subs_gained": _get_int("subscribersGained"),
-            "subs_lost": _get_int("subscribersLost"),
-            "estimated_minutes_watched": _get_float("estimatedMinutesWatched"),
-        })
-
-    return rows_out
+    return to_rows(channel_daily_columns(resp, channel_id))
 
 # Video Daily Analytics
 VIDEO_DAILY_METRIC_NAMES = [
@@ -168,65 +132,12 @@ def transform_video_daily_response(resp: dict, video_id: str) -> List[dict]:
       [day, views, likes, comments, shares, averageViewDuration,
        averageViewPercentage, estimatedMinutesWatched]
     """
-    if not resp or not resp.get("rows"):
-        return []
-
-    headers = resp.get("columnHeaders", [])
-    idx_map = {h["name"]: i for i, h in enumerate(headers)}
-
-    out: List[dict] = []
-    for raw_row in resp["rows"]:
-        day_str = raw_row[idx_map.get("day", 0)]
-        day_d = _parse_iso_date(day_str)
-
-        def _get_int(name: str) -> int:
-            idx = idx_map.get(name)
-            if idx is None:
-                return 0
-            try:
-                return int(raw_row[idx])
-            except (TypeError, ValueError):
-                return 0
-
-        def _get_float(name: str) -> float:
-            idx = idx_map.get(name)
-            if idx is None:
-                return 0.0
-            try:
-                return float(raw_row[idx])
-            except (TypeError, ValueError):
-                return 0.0
-
-        avg_dur = _get_float("averageViewDuration")
-        avg_pct = _get_float("averageViewPercentage")
-        watch_time = _get_float("estimatedMinutesWatched")
-
-        out.append({
-            "video_id": video_id,
-            "date": day_d,
-            "views": _get_int("views"),
-            "likes": _get_int("likes"),
-            "comments": _get_int("comments"),
-            "shares": _get_int("shares"),
-            "watch_time": watch_time,
-            "avg_view_duration": avg_dur,
-            "avg_view_percent": avg_pct,
-        })
-
-    return out
+    return to_rows(video_daily_columns(resp, video_id))
 
 """
-Given a sequence of raw per-video analytics responses (each for a single video),
-flatten into one list of row dicts for bulk upsert.
-The video_id is not always in the response... must pass responses
-that already retain context OR each resp must contain a 'filters' echo.
-For safety, we accept that fetch_video_daily_analytics *does not* include the video id
-in rows—so caller should wrap transform_video_daily_response individually.
-This helper is provided only if accumulate rows yourself.
+Flatten multi-video analytics responses (dimensions=video,day, as returned by
+fetch_many_video_daily_analytics) into one list of video_daily_stats rows.
+Each raw row carries its own video id in the 'video' column.
 """
 def transform_many_video_daily(responses: Sequence[dict]) -> List[dict]:
-    # Example usage pattern in a calling script:
-    #   all_rows = []
-    #   for (video_id, resp) in video_responses:
-    #       all_rows.extend(transform_video_daily_response(resp, video_id))
-    return []  # Implement if standardize a structure containing (video_id, resp)
+    return to_rows(many_video_daily_columns(responses))
@@ -0,0 +1,94 @@
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+from src import metrics
+
+POOL_SIZE = int(os.getenv("YT_HTTP_POOL_SIZE", "16"))
+HTTP_TIMEOUT = float(os.getenv("YT_HTTP_TIMEOUT", "60"))
+TOKEN_HOST = "oauth2.googleapis.com"
+
+"""
+Drop-in for httplib2.Http that is safe to share between threads.
+Each request borrows one keep-alive httplib2.Http from a bounded pool (at most
+`size` exist), so TCP connections and TLS sessions to googleapis are reused
+across channels and calls. Requests ask for gzip-encoded responses; Google only
+compresses when the User-Agent also contains "gzip".
+Every request is counted and timed per host; OAuth token refreshes made by
+AuthorizedHttp go through here too and are booked as the channel's
+"token_refresh" stage.
+"""
+class PooledHttp:
+    follow_redirects = True
+    redirect_codes = frozenset((300, 301, 302, 303, 307, 308))   # httplib2.REDIRECT_CODES
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float | None = HTTP_TIMEOUT):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                import httplib2  # deferred: only processes that call an API pay for it
+                self._created += 1
+                return httplib2.Http(timeout=self.timeout)
+        return self._idle.get()
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        headers = dict(headers or {})
+        ua_key = next((k for k in headers if k.lower() == "user-agent"), "user-agent")
+        ua = headers.get(ua_key, "")
+        if "gzip" not in ua:
+            headers[ua_key] = f"{ua} (gzip)".strip()
+        if not any(k.lower() == "accept-encoding" for k in headers):
+            headers["accept-encoding"] = "gzip"
+
+        host = urlsplit(uri).hostname or ""
+        http = self._checkout()
+        t0 = time.perf_counter()
+        try:
+            resp, content = http.request(uri, method, body, headers, *args, **kwargs)
+        finally:
+            self._idle.put(http)
+            elapsed = time.perf_counter() - t0
+            metrics.observe("http_request_seconds", elapsed, host=host)
+            if host == TOKEN_HOST:
+                metrics.stage_time("token_refresh", elapsed)
+        metrics.inc("http_requests_total", host=host, status=resp.status)
+        metrics.inc("http_response_bytes_total", len(content or b""), host=host)
+        return resp, content
+
+    def close(self) -> None:
+        while True:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            http.close()
+            with self._lock:
+                self._created -= 1
+
+
+_shared: PooledHttp | None = None
+_shared_lock = threading.Lock()
+
+# Process-wide pool used by the public and the OAuth clients.
+def shared_http() -> PooledHttp:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PooledHttp()
+        return _shared
+
+# Credentialed view of the shared pool (one per credentials object).
+def authorized_http(creds):
+    import google_auth_httplib2
+    return google_auth_httplib2.AuthorizedHttp(creds, http=shared_http())
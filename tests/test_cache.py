@@ -0,0 +1,148 @@
+import json
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence, HttpRequest
+from googleapiclient.model import JsonModel
+from src import cache, fetch
+from src.quota import QuotaLedger
+
+BASE = "https://youtubeanalytics.googleapis.com/v2/reports"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "http_cache")
+    monkeypatch.setattr(cache, "_total_bytes", None)
+    monkeypatch.setattr(cache, "_mode", "on")
+    return tmp_path / "http_cache"
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = QuotaLedger(tmp_path / "quota.json")
+    monkeypatch.setattr(fetch, "get_ledger", lambda: ledger)
+    return ledger
+
+
+class Req:
+    def __init__(self, uri: str, body=None):
+        self.uri = uri
+        self.body = body
+
+def _key(uri: str, body=None) -> str | None:
+    return cache.request_key("youtube", "videos.list", Req(uri, body))
+
+def _http_error(status: int, reason: str = "notFound") -> HttpError:
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": str(status)}), content, uri=BASE)
+
+
+def test_key_ignores_param_order_and_credentials():
+    assert _key(f"{BASE}?id=a&part=snippet") == _key(f"{BASE}?part=snippet&id=a&key=K&quotaUser=u")
+    assert _key(f"{BASE}?id=a") == _key(f"{BASE}?id=a&access_token=T")
+
+def test_key_depends_on_params_endpoint_and_body():
+    assert _key(f"{BASE}?id=a") != _key(f"{BASE}?id=b")
+    assert _key(f"{BASE}?id=a") != cache.request_key("youtube", "channels.list", Req(f"{BASE}?id=a"))
+    assert _key(f"{BASE}?id=a") != _key(f"{BASE}?id=a", body="x")
+
+def test_no_key_without_uri():
+    assert _key("") is None
+    assert cache.request_key("youtube", "videos.list", object()) is None
+
+
+def test_store_and_lookup():
+    key = _key(f"{BASE}?id=a")
+    cache.store("youtube", "videos.list", key, {"items": [1]})
+    assert cache.lookup("youtube", "videos.list", key) == {"items": [1]}
+    assert cache.lookup("youtube", "videos.list", _key(f"{BASE}?id=b")) is None
+
+def test_stale_entry_is_a_miss_except_in_replay(monkeypatch):
+    key = _key(f"{BASE}?id=a")
+    cache.store("youtube", "videos.list", key, {"items": []})
+    monkeypatch.setitem(cache.TTLS, "videos.list", -1)
+    assert cache.lookup("youtube", "videos.list", key) is None
+    monkeypatch.setattr(cache, "_mode", "replay")
+    assert cache.lookup("youtube", "videos.list", key) == {"items": []}
+
+def test_record_mode_stores_but_never_serves(monkeypatch):
+    monkeypatch.setattr(cache, "_mode", "record")
+    key = _key(f"{BASE}?id=a")
+    cache.store("youtube", "videos.list", key, {"items": []})
+    assert cache.lookup("youtube", "videos.list", key) is None
+    monkeypatch.setattr(cache, "_mode", "on")
+    assert cache.lookup("youtube", "videos.list", key) == {"items": []}
+
+def test_off_mode_stores_nothing(monkeypatch, cache_dir):
+    monkeypatch.setattr(cache, "_mode", "off")
+    cache.store("youtube", "videos.list", _key(f"{BASE}?id=a"), {"items": []})
+    assert not cache_dir.exists()
+
+def test_replay_miss_raises(monkeypatch):
+    monkeypatch.setattr(cache, "_mode", "replay")
+    with pytest.raises(cache.CacheMiss):
+        cache.lookup("youtube", "videos.list", _key(f"{BASE}?id=a"))
+    with pytest.raises(cache.CacheMiss):
+        cache.lookup("youtube", "videos.list", None)
+
+def test_stored_error_is_raised_again():
+    key = _key(f"{BASE}?id=a")
+    cache.store_error("youtube", "videos.list", key, _http_error(404))
+    with pytest.raises(HttpError) as exc:
+        cache.lookup("youtube", "videos.list", key, BASE)
+    assert exc.value.resp.status == 404
+    assert json.loads(exc.value.content)["error"]["errors"][0]["reason"] == "notFound"
+
+# Throttling, quota and server errors are failures, not answers
+@pytest.mark.parametrize("status", [403, 429, 500])
+def test_transient_errors_are_not_stored(status):
+    key = _key(f"{BASE}?id=a")
+    cache.store_error("youtube", "videos.list", key, _http_error(status, "backendError"))
+    assert cache.lookup("youtube", "videos.list", key) is None
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(cache, "MAX_BYTES", 1)
+    first, second = _key(f"{BASE}?id=a"), _key(f"{BASE}?id=b")
+    cache.store("youtube", "videos.list", first, {"items": []})
+    cache.store("youtube", "videos.list", second, {"items": []})
+    assert cache.lookup("youtube", "videos.list", first) is None
+
+
+# A real request with the report query googleapiclient sends for a batch of
+# video IDs; over 2048 characters, execute() turns it into a POST.
+def _report_request(http, n_videos: int) -> HttpRequest:
+    ids = ",".join(f"video{i:06d}xyz" for i in range(n_videos))
+    uri = (f"{BASE}?ids=channel%3D%3DMINE&metrics=views&dimensions=video%2Cday"
+           f"&startDate=2024-01-01&endDate=2024-01-31&filters=video%3D%3D{ids}&alt=json")
+    return HttpRequest(http, JsonModel().response, uri)
+
+@pytest.mark.parametrize("n_videos", [5, 200])
+def test_long_get_is_served_from_cache(ledger, n_videos):
+    http = HttpMockSequence([({"status": "200"}, json.dumps({"rows": [[1]]}))])
+    first = _report_request(http, n_videos)
+    assert fetch._execute_once(first, "youtubeAnalytics", "reports.query") == {"rows": [[1]]}
+    if n_videos == 200:
+        assert len(first.uri) < 2048 and first.method == "POST"   # execute() rewrote it
+    # A second network call would fail: the mock has no responses left
+    again = fetch._execute_once(_report_request(http, n_videos), "youtubeAnalytics", "reports.query")
+    assert again == {"rows": [[1]]}
+    assert ledger.run_units["youtubeAnalytics"] == 1
+
+def test_long_get_replays_offline(ledger, monkeypatch):
+    monkeypatch.setattr(cache, "_mode", "record")
+    http = HttpMockSequence([({"status": "200"}, json.dumps({"rows": []}))])
+    fetch._execute_once(_report_request(http, 200), "youtubeAnalytics", "reports.query")
+    monkeypatch.setattr(cache, "_mode", "replay")
+    assert fetch._execute_once(_report_request(http, 200), "youtubeAnalytics", "reports.query") == {"rows": []}
+
+def test_recorded_404_replays_without_network(ledger, monkeypatch):
+    body = json.dumps({"error": {"code": 404, "errors": [{"reason": "playlistNotFound"}]}})
+    http = HttpMockSequence([({"status": "404"}, body)])
+    with pytest.raises(HttpError):
+        fetch._execute_once(_report_request(http, 200), "youtubeAnalytics", "reports.query")
+    monkeypatch.setattr(cache, "_mode", "replay")
+    with pytest.raises(HttpError) as exc:
+        fetch._execute_once(_report_request(http, 200), "youtubeAnalytics", "reports.query")
+    assert exc.value.resp.status == 404
+    assert ledger.run_units["youtubeAnalytics"] == 1
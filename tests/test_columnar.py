@@ -0,0 +1,104 @@
+from datetime import date
+import numpy as np
+import pytest
+from src import columnar
+
+
+def _dates(values) -> list:
+    return columnar._dates(values).tolist()
+
+
+def test_dates_iso():
+    assert _dates(["2024-01-01", "2024-02-29"]) == [date(2024, 1, 1), date(2024, 2, 29)]
+
+def test_dates_null_and_empty_are_nat():
+    assert _dates(["2024-01-01", None, ""]) == [date(2024, 1, 1), None, None]
+
+# NumPy alone would read "2024-01" as 2024-01-01 and "today" as today
+@pytest.mark.parametrize("junk", ["n/a", "2024-01", "2024", "today", "NaT", "2024-02-30", "2024-1-5", 17])
+def test_dates_junk_and_partial_are_nat(junk):
+    assert _dates(["2024-01-01", junk, "2024-01-03"]) == [date(2024, 1, 1), None, date(2024, 1, 3)]
+
+# The fallback must agree with date.fromisoformat, which also takes the basic format
+def test_dates_fallback_matches_fromisoformat():
+    assert _dates(["20240105", "n/a"]) == [date(2024, 1, 5), None]
+
+def test_dates_empty_column():
+    assert columnar._dates([]).dtype == np.dtype(columnar.DATE)
+    assert _dates([]) == []
+
+
+def test_ints():
+    arr = columnar._ints([1, "2", 3])
+    assert arr.dtype == np.int64
+    assert arr.tolist() == [1, 2, 3]
+
+# Same as int(x) with a 0 fallback
+@pytest.mark.parametrize("junk", [None, "", "n/a", "1.5"])
+def test_ints_junk_is_zero(junk):
+    assert columnar._ints([7, junk]).tolist() == [7, 0]
+
+def test_floats():
+    arr = columnar._floats([1, "2.5", 3.25])
+    assert arr.dtype == np.float64
+    assert arr.tolist() == [1.0, 2.5, 3.25]
+
+# None must become 0.0 like the row transform, not the NaN np.fromiter makes of it
+@pytest.mark.parametrize("junk", [None, "", "n/a"])
+def test_floats_junk_is_zero(junk):
+    assert columnar._floats([1.5, junk]).tolist() == [1.5, 0.0]
+
+
+def _cols(video_ids, days, views) -> columnar.Columns:
+    return {
+        "video_id": np.array(video_ids, dtype=object),
+        "date": np.array(days, dtype=columnar.DATE),
+        "views": np.array(views, dtype=np.int64),
+    }
+
+def test_to_rows_gives_python_values():
+    rows = columnar.to_rows(_cols(["a", "b"], ["2024-01-01", None], [1, 2]))
+    assert rows == [
+        {"video_id": "a", "date": date(2024, 1, 1), "views": 1},
+        {"video_id": "b", "date": None, "views": 2},
+    ]
+    assert type(rows[0]["views"]) is int
+
+def test_to_rows_keeps_column_order():
+    assert list(columnar.to_rows(_cols(["a"], ["2024-01-01"], [1]))[0]) == ["video_id", "date", "views"]
+
+def test_to_rows_empty():
+    assert columnar.to_rows(_cols([], [], [])) == []
+
+def test_concat():
+    out = columnar.concat([_cols(["a"], ["2024-01-01"], [1]), _cols(["b", "c"], ["2024-01-02", None], [2, 3])])
+    assert list(out) == ["video_id", "date", "views"]
+    assert columnar.num_rows(out) == 3
+    assert out["views"].tolist() == [1, 2, 3]
+    assert out["date"].tolist() == [date(2024, 1, 1), date(2024, 1, 2), None]
+
+def test_concat_single_part_is_returned_as_is():
+    part = _cols(["a"], ["2024-01-01"], [1])
+    assert columnar.concat([part]) is part
+
+def test_is_columns():
+    assert columnar.is_columns(_cols(["a"], ["2024-01-01"], [1]))
+    assert not columnar.is_columns([{"video_id": "a"}])
+    assert not columnar.is_columns({"video_id": "a", "views": 1})   # a row dict, not Columns
+
+
+HEADERS = [{"name": n} for n in ("video", "day", "views", "likes", "comments", "shares",
+                                 "averageViewDuration", "averageViewPercentage", "estimatedMinutesWatched")]
+
+# Null, junk and partial-date values become 0 / 0.0 / None, as int()/float()/date.fromisoformat would
+def test_many_video_daily_columns_junk_rows():
+    resp = {"columnHeaders": HEADERS, "rows": [
+        ["a", "2024-01-01", 10, 1, 0, 0, 30.0, 50.0, 5.0],
+        ["a", "2024-01-02", 11, None, 0, "", 31.0, 51.0, "n/a"],
+        ["b", "2024-01", 12, 2, 1, 0, 32.0, 52.0, 6.0],
+    ]}
+    rows = columnar.to_rows(columnar.many_video_daily_columns([resp]))
+    assert rows[1] == {"video_id": "a", "date": date(2024, 1, 2), "views": 11, "likes": 0, "comments": 0,
+                       "shares": 0, "watch_time": 0.0, "avg_view_duration": 31.0, "avg_view_percent": 51.0}
+    assert [r["date"] for r in rows] == [date(2024, 1, 1), date(2024, 1, 2), None]
+    assert [r["watch_time"] for r in rows] == [5.0, 0.0, 6.0]
@@ -0,0 +1,110 @@
+from datetime import date
+import pytest
+from src.journal import RunJournal, RUN_SCOPE
+from src.main import _select_run
+
+START, END = date(2024, 1, 1), date(2024, 1, 10)
+CHANNELS = ["UCa", "UCb", "UCc"]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal(tmp_path / "journal.sqlite")
+
+
+def test_start_run_records_pending_channels(journal):
+    run_id = journal.start_run(START, END, CHANNELS)
+    assert journal.run_range(run_id) == (START, END)
+    assert journal.unfinished_channels(run_id) == CHANNELS
+    assert not journal.is_done(run_id, "UCa", "ingest")
+
+def test_mark_done_and_failed(journal):
+    run_id = journal.start_run(START, END, CHANNELS)
+    journal.mark(run_id, "UCa", "ingest", START, END)
+    journal.mark(run_id, "UCb", "ingest", START, END, status="failed", error="boom")
+    assert journal.is_done(run_id, "UCa", "ingest")
+    assert not journal.is_done(run_id, "UCb", "ingest")
+    assert journal.unfinished_channels(run_id) == ["UCb", "UCc"]
+
+def test_mark_again_overwrites(journal):
+    run_id = journal.start_run(START, END, CHANNELS)
+    journal.mark(run_id, "UCa", "ingest", START, END, status="failed", error="boom")
+    journal.mark(run_id, "UCa", "ingest", START, END)
+    assert journal.unfinished_channels(run_id) == ["UCb", "UCc"]
+
+def test_is_done_matches_the_date_range(journal):
+    run_id = journal.start_run(START, END, CHANNELS)
+    journal.mark(run_id, "UCa", "video_daily", START, date(2024, 1, 5))
+    assert journal.is_done(run_id, "UCa", "video_daily", START, date(2024, 1, 5))
+    assert not journal.is_done(run_id, "UCa", "video_daily", date(2024, 1, 6), END)
+    assert not journal.is_done(run_id, "UCb", "video_daily", START, date(2024, 1, 5))
+    assert journal.is_done(run_id, "UCa", "video_daily")   # any range
+
+def test_run_scope_units_are_not_channels(journal):
+    run_id = journal.start_run(START, END, CHANNELS)
+    journal.mark(run_id, RUN_SCOPE, "ingest", START, END, status="failed")
+    assert RUN_SCOPE not in journal.unfinished_channels(run_id)
+
+def test_unknown_run(journal):
+    assert journal.run_range("nope") is None
+    assert journal.last_unfinished_run() is None
+
+def test_last_unfinished_run_is_the_newest(journal):
+    first = journal.start_run(START, END, CHANNELS)
+    second = journal.start_run(START, END, CHANNELS)
+    assert journal.last_unfinished_run() == second
+    journal.finish_run(second)
+    assert journal.last_unfinished_run() == first
+    journal.finish_run(first, status="failed")   # failed runs stay resumable
+    assert journal.last_unfinished_run() == first
+
+def test_carry_over_copies_finished_units_of_unfinished_channels(journal):
+    old = journal.start_run(START, END, CHANNELS)
+    journal.mark(old, "UCa", "ingest", START, END)
+    journal.mark(old, "UCb", "channel_daily", START, date(2024, 1, 5))
+    journal.mark(old, "UCb", "video_daily", START, date(2024, 1, 5), status="failed")
+    new = journal.start_run(START, END, ["UCb", "UCc"], carry_over_from=old)
+    assert journal.is_done(new, "UCb", "channel_daily", START, date(2024, 1, 5))
+    assert not journal.is_done(new, "UCb", "video_daily")
+    assert journal.unfinished_channels(new) == ["UCb", "UCc"]   # ingest units start pending
+
+
+# Resume selection in main
+def test_select_new_run(journal):
+    run_id, start, end, channels = _select_run(journal, False, None, START, END, CHANNELS)
+    assert (start, end, channels) == (START, END, CHANNELS)
+    assert journal.unfinished_channels(run_id) == CHANNELS
+
+def test_select_new_run_rejects_reversed_dates(journal):
+    with pytest.raises(ValueError, match="after"):
+        _select_run(journal, False, None, END, START, CHANNELS)
+
+def test_select_resume_continues_the_last_unfinished_run(journal):
+    old = journal.start_run(START, END, CHANNELS)
+    journal.mark(old, "UCa", "ingest", START, END)
+    run_id, start, end, channels = _select_run(
+        journal, True, None, date(2024, 2, 1), date(2024, 2, 2), CHANNELS
+    )
+    assert (run_id, start, end, channels) == (old, START, END, ["UCb", "UCc"])
+
+def test_select_resume_without_unfinished_run(journal):
+    journal.finish_run(journal.start_run(START, END, CHANNELS))
+    with pytest.raises(ValueError, match="no unfinished run"):
+        _select_run(journal, True, None, START, END, CHANNELS)
+
+def test_select_rerun_failed_starts_a_new_run(journal):
+    old = journal.start_run(START, END, CHANNELS)
+    journal.mark(old, "UCa", "ingest", START, END)
+    journal.mark(old, "UCb", "ingest", START, END, status="failed", error="boom")
+    journal.mark(old, "UCb", "discovery", START, END)
+    journal.finish_run(old)
+    run_id, start, end, channels = _select_run(
+        journal, False, old, date(2024, 2, 1), date(2024, 2, 2), CHANNELS
+    )
+    assert run_id != old
+    assert (start, end, channels) == (START, END, ["UCb", "UCc"])
+    assert journal.is_done(run_id, "UCb", "discovery", START, END)
+
+def test_select_rerun_failed_unknown_run(journal):
+    with pytest.raises(ValueError, match="unknown run id"):
+        _select_run(journal, False, "nope", START, END, CHANNELS)
@@ -0,0 +1,169 @@
+import threading
+import time
+import numpy as np
+import pytest
+from src import columnar, metrics
+from src.db import UpsertResult
+from src.pipeline import BatchWriter
+
+
+# Upsert stand-in: records each batch and the thread that wrote it
+class FakeUpsert:
+    def __init__(self, fail_on: int | None = None):
+        self.batches = []
+        self.threads = []
+        self.fail_on = fail_on
+
+    def __call__(self, batch) -> UpsertResult:
+        if self.fail_on is not None and len(self.batches) == self.fail_on:
+            raise RuntimeError("write failed")
+        self.batches.append(batch)
+        self.threads.append(threading.current_thread().name)
+        n = columnar.num_rows(batch) if columnar.is_columns(batch) else len(batch)
+        return UpsertResult(inserted=n)
+
+    def rows(self) -> list[dict]:
+        out = []
+        for b in self.batches:
+            out.extend(columnar.to_rows(b) if columnar.is_columns(b) else b)
+        return out
+
+
+def _rows(lo: int, hi: int) -> list[dict]:
+    return [{"id": i} for i in range(lo, hi)]
+
+def _cols(lo: int, hi: int) -> columnar.Columns:
+    return {"id": np.arange(lo, hi, dtype=np.int64)}
+
+
+def test_writes_every_row_in_order():
+    up = FakeUpsert()
+    with BatchWriter(batch_rows=7) as writer:
+        for lo in range(0, 50, 5):
+            writer.put("t", up, _rows(lo, lo + 5))
+    assert up.rows() == _rows(0, 50)
+    assert writer.counts == {"t": UpsertResult(inserted=50)}
+    assert all(t == "batch-writer" for t in up.threads)
+
+# batch_rows is an upper bound: a batch is written once it reaches it
+def test_batches_never_exceed_batch_rows_plus_one_put():
+    up = FakeUpsert()
+    with BatchWriter(batch_rows=10) as writer:
+        for lo in range(0, 100, 4):
+            writer.put("t", up, _rows(lo, lo + 4))
+    assert max(len(b) for b in up.batches) < 10 + 4
+
+def test_counts_per_table():
+    videos, daily = FakeUpsert(), FakeUpsert()
+    with BatchWriter() as writer:
+        writer.put("videos", videos, _rows(0, 3))
+        writer.put("video_daily_stats", daily, _cols(0, 4))
+        writer.put("videos", videos, _rows(3, 5))
+    assert writer.counts == {"videos": UpsertResult(inserted=5), "video_daily_stats": UpsertResult(inserted=4)}
+
+def test_columns_batches_are_concatenated():
+    up = FakeUpsert()
+    with BatchWriter(batch_rows=1000) as writer:
+        for lo in range(0, 30, 10):
+            writer.put("t", up, _cols(lo, lo + 10))
+    assert all(columnar.is_columns(b) for b in up.batches)
+    assert up.rows() == _rows(0, 30)
+
+def test_empty_batches_are_skipped():
+    up = FakeUpsert()
+    with BatchWriter() as writer:
+        writer.put("t", up, [])
+        writer.put("t", up, _cols(0, 0))
+    assert up.batches == []
+    assert writer.counts == {}
+
+# A table takes either row dicts or Columns; mixing them is refused at put()
+def test_mixing_rows_and_columns_raises():
+    up = FakeUpsert()
+    with BatchWriter() as writer:
+        writer.put("t", up, _cols(0, 2))
+        with pytest.raises(TypeError, match="cannot mix"):
+            writer.put("t", up, _rows(2, 4))
+        writer.put("other", up, _rows(0, 1))
+    assert up.rows() == _rows(0, 2) + _rows(0, 1)
+
+
+def test_write_error_is_raised_on_exit():
+    up = FakeUpsert(fail_on=0)
+    with pytest.raises(RuntimeError, match="write failed"):
+        with BatchWriter() as writer:
+            writer.put("t", up, _rows(0, 3))
+
+def test_write_error_is_raised_from_next_put():
+    up = FakeUpsert(fail_on=0)
+    with pytest.raises(RuntimeError, match="write failed"):   # and again on exit
+        with BatchWriter() as writer:
+            writer.put("t", up, _rows(0, 1))
+            deadline = time.monotonic() + 5
+            with pytest.raises(RuntimeError, match="write failed"):
+                while time.monotonic() < deadline:
+                    writer.put("t", up, _rows(1, 2))
+                    time.sleep(0.01)
+    assert up.batches == []
+
+# Rows handed over before the caller failed are still written; the caller's error wins
+def test_caller_error_still_writes_buffered_rows():
+    up = FakeUpsert()
+    with pytest.raises(ValueError):
+        with BatchWriter(batch_rows=1000) as writer:
+            writer.put("t", up, _rows(0, 5))
+            raise ValueError("fetch failed")
+    assert up.rows() == _rows(0, 5)
+
+def test_caller_error_is_not_masked_by_write_error():
+    up = FakeUpsert(fail_on=0)
+    with pytest.raises(ValueError):
+        with BatchWriter() as writer:
+            writer.put("t", up, _rows(0, 5))
+            raise ValueError("fetch failed")
+
+
+# A checkpoint runs once every row put before it is written, on the writer thread
+def test_checkpoint_runs_after_earlier_rows_are_written():
+    up = FakeUpsert()
+    seen = []
+    with BatchWriter(batch_rows=1000) as writer:
+        writer.put("t", up, _rows(0, 5))
+        writer.checkpoint(lambda: seen.append(len(up.rows())))
+        writer.put("t", up, _rows(5, 7))
+    assert seen == [5]
+    assert up.rows() == _rows(0, 7)
+
+def test_checkpoint_is_skipped_after_a_write_error():
+    up = FakeUpsert(fail_on=0)
+    seen = []
+    with pytest.raises(RuntimeError, match="write failed"):
+        with BatchWriter() as writer:
+            writer.put("t", up, _rows(0, 3))
+            writer.checkpoint(lambda: seen.append(True))
+    assert seen == []
+
+# Under the profiler the writes run on the caller's thread, so the profile sees them
+def test_profiled_writes_inline(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    monkeypatch.setattr(metrics, "PROFILE_CHANNELS", {"UCx"})
+    up = FakeUpsert()
+    with metrics.profiled("UCx"):
+        with BatchWriter(batch_rows=4) as writer:
+            for lo in range(0, 10, 2):
+                writer.put("t", up, _rows(lo, lo + 2))
+    assert up.rows() == _rows(0, 10)
+    assert set(up.threads) == {threading.current_thread().name}
+    assert [len(b) for b in up.batches] == [4, 4, 2]
+    assert list(tmp_path.glob("profile-UCx-*"))
+
+def test_profiled_checkpoint_writes_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    monkeypatch.setattr(metrics, "PROFILE_CHANNELS", {"UCx"})
+    up = FakeUpsert()
+    seen = []
+    with metrics.profiled("UCx"):
+        with BatchWriter(batch_rows=1000) as writer:
+            writer.put("t", up, _rows(0, 3))
+            writer.checkpoint(lambda: seen.append(len(up.rows())))
+    assert seen == [3]
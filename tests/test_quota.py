@@ -0,0 +1,120 @@
+import json
+import pytest
+from src import quota
+from src.quota import QuotaLedger, plan_run, quota_stage
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return QuotaLedger(tmp_path / "quota.json")
+
+# Book units to cid the way fetch does: under current_channel and a stage
+def _spend(ledger: QuotaLedger, cid: str, stage: str = "core", api: str = "youtube", units: int = 1) -> None:
+    token = quota.current_channel.set(cid)
+    try:
+        with quota_stage(stage):
+            ledger.charge(api, "videos.list", units)
+    finally:
+        quota.current_channel.reset(token)
+
+# Ledger with a saved history: each channel cost `core` required and `refresh` optional units
+def _history(ledger: QuotaLedger, channels: list[str], core: int, refresh: int = 0) -> None:
+    for cid in channels:
+        _spend(ledger, cid, "core", units=core)
+        if refresh:
+            _spend(ledger, cid, "refresh", units=refresh)
+    ledger.save()
+    ledger._state["daily"].clear()   # as if recorded on an earlier day
+
+
+def test_charge_uses_endpoint_costs(ledger):
+    ledger.charge("youtube", "channels.list")
+    ledger.charge("youtubeAnalytics", "reports.query")
+    ledger.charge("youtube", "search.list", 100)
+    assert ledger.run_units == {"youtube": 101, "youtubeAnalytics": 1}
+
+def test_charge_books_channel_and_stage(ledger):
+    _spend(ledger, "UCa", units=3)
+    _spend(ledger, "UCa", "refresh", units=2)
+    ledger.charge("youtube", "videos.list")   # outside any channel
+    assert ledger.by_channel == {"UCa": {"core": {"youtube": 3}, "refresh": {"youtube": 2}}}
+    assert ledger.run_units["youtube"] == 6
+
+def test_used_today_adds_saved_and_run_units(ledger, tmp_path):
+    ledger.charge("youtube", "videos.list", 40)
+    ledger.save()
+    again = QuotaLedger(tmp_path / "quota.json")
+    again.charge("youtube", "videos.list", 2)
+    assert again.used_today("youtube") == 42
+    assert again.used_today("youtubeAnalytics") == 0
+
+def test_used_today_resets_on_a_new_quota_day(ledger, tmp_path, monkeypatch):
+    ledger.charge("youtube", "videos.list", 40)
+    ledger.save()
+    monkeypatch.setattr(quota, "quota_day", lambda: "2999-01-01")
+    assert QuotaLedger(tmp_path / "quota.json").used_today("youtube") == 0
+
+def test_save_keeps_recent_days_only(ledger, tmp_path, monkeypatch):
+    for day in range(1, quota.KEEP_DAYS + 6):
+        monkeypatch.setattr(quota, "quota_day", lambda day=day: f"2024-01-{day:02d}")
+        ledger.charge("youtube", "videos.list")
+        ledger.save()
+    daily = json.loads((tmp_path / "quota.json").read_text())["daily"]
+    assert len(daily) == quota.KEEP_DAYS
+    assert min(daily) == "2024-01-06"
+
+def test_estimate_is_last_run_usage(ledger, tmp_path):
+    assert ledger.estimate("UCa") == quota.DEFAULT_CHANNEL_ESTIMATE
+    _spend(ledger, "UCa", units=7)
+    ledger.save()
+    assert QuotaLedger(tmp_path / "quota.json").estimate("UCa") == {"core": {"youtube": 7}}
+
+
+def test_plan_fits_everything_in_a_large_budget(ledger):
+    _history(ledger, ["UCa", "UCb"], core=10, refresh=5)
+    plan = plan_run(["UCa", "UCb"], ledger=ledger, budgets={"youtube": 1000})
+    assert plan.channels == ["UCa", "UCb"]
+    assert plan.skipped == [] and plan.deferred == {}
+    assert plan.projected == {"youtube": 30}
+
+def test_plan_skips_channels_past_the_budget(ledger):
+    _history(ledger, ["UCa", "UCb", "UCc", "UCd"], core=10)
+    plan = plan_run(["UCa", "UCb", "UCc", "UCd"], ledger=ledger, budgets={"youtube": 25})
+    assert plan.channels == ["UCa", "UCb"]
+    assert plan.skipped == ["UCc", "UCd"]
+    assert plan.projected == {"youtube": 20}
+
+def test_plan_puts_priority_channels_first(ledger):
+    _history(ledger, ["UCa", "UCb", "UCc"], core=10)
+    plan = plan_run(["UCa", "UCb", "UCc"], priority=["UCc"], ledger=ledger, budgets={"youtube": 20})
+    assert plan.channels == ["UCc", "UCa"]
+    assert plan.skipped == ["UCb"]
+
+# Required stages of every channel come before any channel's optional ones
+def test_plan_defers_optional_stages_first(ledger):
+    _history(ledger, ["UCa", "UCb", "UCc"], core=10, refresh=10)
+    plan = plan_run(["UCa", "UCb", "UCc"], ledger=ledger, budgets={"youtube": 45})
+    assert plan.channels == ["UCa", "UCb", "UCc"]
+    assert plan.deferred == {"UCb": {"refresh"}, "UCc": {"refresh"}}
+    assert plan.projected == {"youtube": 40}
+
+def test_plan_counts_units_already_used_today(ledger):
+    _history(ledger, ["UCa", "UCb"], core=10)
+    ledger.charge("youtube", "videos.list", 85)
+    plan = plan_run(["UCa", "UCb"], ledger=ledger, budgets={"youtube": 100})
+    assert plan.channels == ["UCa"]
+    assert plan.skipped == ["UCb"]
+    assert plan.projected == {"youtube": 95}
+
+def test_plan_uses_default_estimate_for_new_channels(ledger):
+    per_channel = quota.DEFAULT_CHANNEL_ESTIMATE["core"]["youtube"]
+    plan = plan_run(["UCa", "UCb", "UCc"], ledger=ledger, budgets={"youtube": 2 * per_channel})
+    assert plan.channels == ["UCa", "UCb"]
+    assert plan.skipped == ["UCc"]
+
+# A budget of 0 means the API isn't planned against
+def test_plan_ignores_unbudgeted_apis(ledger):
+    _history(ledger, ["UCa", "UCb"], core=10)
+    plan = plan_run(["UCa", "UCb"], ledger=ledger, budgets={"youtube": 0, "youtubeAnalytics": 0})
+    assert plan.channels == ["UCa", "UCb"]
+    assert plan.projected == {}
@@ -0,0 +1,212 @@
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from src import ratelimit
+
+
+# Stands in for the time module: sleep() only moves the clock forward
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+# Fresh limiters per test, without pacing so only retries move the clock
+@pytest.fixture
+def limiters(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_api_buckets", {})
+    monkeypatch.setattr(ratelimit, "_credential_buckets", {})
+    monkeypatch.setattr(ratelimit, "_concurrency", {})
+    monkeypatch.setattr(ratelimit, "_breakers", {})
+    monkeypatch.setitem(ratelimit.API_RATES, "youtube", 0)
+    monkeypatch.setattr(ratelimit, "CREDENTIAL_RATE", 0)
+    monkeypatch.setattr(ratelimit, "quota_day", lambda: "2024-01-01")
+
+def _http_error(status: int, reason: str = "backendError", retry_after: str | None = None) -> HttpError:
+    headers = {"status": str(status)}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response(headers), content)
+
+# fn for call(): raises the queued errors in turn, then returns "ok"
+class Api:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_bucket_paces_to_rate(clock):
+    bucket = ratelimit.TokenBucket(rate=2, burst=1)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now - 1000.0 == pytest.approx(2.0)
+
+def test_bucket_burst_is_free(clock):
+    bucket = ratelimit.TokenBucket(rate=4)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+def test_bucket_refills_while_idle(clock):
+    bucket = ratelimit.TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    clock.now += 5
+    bucket.acquire()
+    assert clock.sleeps == []
+
+def test_zero_rate_never_waits(clock):
+    bucket = ratelimit.TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+def test_pause_holds_the_next_acquire(clock):
+    bucket = ratelimit.TokenBucket(rate=10)
+    bucket.pause(3)
+    bucket.acquire()
+    assert clock.now - 1000.0 == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize("value, seconds", [("7", 7.0), ("0.5", 0.5), ("-3", 0.0)])
+def test_retry_after_seconds(value, seconds):
+    assert ratelimit._retry_after(_http_error(429, retry_after=value)) == seconds
+
+def test_retry_after_http_date():
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= ratelimit._retry_after(_http_error(429, retry_after=when)) <= 30
+
+def test_retry_after_past_date_is_zero():
+    when = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert ratelimit._retry_after(_http_error(503, retry_after=when)) == 0.0
+
+@pytest.mark.parametrize("value", [None, "", "soon"])
+def test_retry_after_missing_or_junk(value):
+    assert ratelimit._retry_after(_http_error(429, retry_after=value)) is None
+
+
+def test_backoff_is_full_jitter_up_to_the_cap(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda lo, hi: bounds.append((lo, hi)) or hi)
+    assert [ratelimit._backoff(a) for a in (1, 2, 3)] == [2.0, 4.0, 8.0]
+    assert ratelimit._backoff(20) == ratelimit.BACKOFF_CAP
+    assert all(lo == 0 for lo, _ in bounds)
+
+def test_backoff_stays_in_bounds():
+    for attempt in range(10):
+        cap = min(ratelimit.BACKOFF_CAP, ratelimit.BACKOFF_BASE * 2 ** attempt)
+        assert all(0 <= ratelimit._backoff(attempt) <= cap for _ in range(50))
+
+
+def test_concurrency_halves_on_throttle_down_to_min():
+    limiter = ratelimit.AdaptiveConcurrency(initial=8)
+    limits = []
+    for _ in range(5):
+        limiter.on_throttle()
+        limits.append(limiter.limit)
+    assert limits == [4, 2, 1, 1, 1]
+
+def test_concurrency_grows_by_one_per_window():
+    limiter = ratelimit.AdaptiveConcurrency(initial=4)
+    for _ in range(4):
+        limiter.on_success()
+    assert 4.9 < limiter.limit < 5.0   # 1/limit per success: about +1 per limit successes
+
+def test_concurrency_is_capped(monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_CONCURRENCY", 3)
+    limiter = ratelimit.AdaptiveConcurrency(initial=10)
+    assert limiter.limit == 3
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.limit == 3
+
+
+def test_call_retries_throttles_after_retry_after(limiters, clock):
+    api = Api(_http_error(429, retry_after="5"), _http_error(403, "rateLimitExceeded", retry_after="2"))
+    assert ratelimit.call("youtube", "public", api) == "ok"
+    assert api.calls == 3
+    assert clock.sleeps == [5.0, 2.0]
+    assert ratelimit._concurrency["youtube"].limit == 2   # 4 -> 2 -> 1, then +1/1
+
+def test_call_backs_off_on_server_errors(limiters, clock, monkeypatch):
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda lo, hi: hi)
+    api = Api(_http_error(500), _http_error(503))
+    assert ratelimit.call("youtube", "public", api) == "ok"
+    assert clock.sleeps == [2.0, 4.0]
+
+def test_call_gives_up_after_max_attempts(limiters):
+    api = Api(*[_http_error(500)] * ratelimit.MAX_ATTEMPTS)
+    with pytest.raises(HttpError):
+        ratelimit.call("youtube", "public", api)
+    assert api.calls == ratelimit.MAX_ATTEMPTS
+
+def test_call_raises_other_errors_at_once(limiters, clock):
+    api = Api(_http_error(404, "notFound"))
+    with pytest.raises(HttpError):
+        ratelimit.call("youtube", "public", api)
+    assert api.calls == 1
+    assert clock.sleeps == []
+
+
+def test_quota_error_opens_the_breaker(limiters):
+    api = Api(_http_error(403, "quotaExceeded"))
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", api)
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", api)
+    assert api.calls == 1   # the second call never reached the API
+
+def test_breaker_half_opens_on_the_next_quota_day(limiters, monkeypatch):
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", Api(_http_error(403, "quotaExceeded")))
+    monkeypatch.setattr(ratelimit, "quota_day", lambda: "2024-01-02")
+    api = Api()
+    assert ratelimit.call("youtube", "public", api) == "ok"   # the probe
+    assert ratelimit.call("youtube", "public", api) == "ok"   # closed again
+    assert api.calls == 2
+
+def test_failed_probe_reopens_until_the_next_day(limiters, monkeypatch):
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", Api(_http_error(403, "quotaExceeded")))
+    monkeypatch.setattr(ratelimit, "quota_day", lambda: "2024-01-02")
+    api = Api(_http_error(403, "dailyLimitExceeded"))
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", api)
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        ratelimit.call("youtube", "public", api)
+    assert api.calls == 1
+
+def test_half_open_breaker_lets_one_probe_through(monkeypatch):
+    monkeypatch.setattr(ratelimit, "quota_day", lambda: "2024-01-01")
+    breaker = ratelimit.CircuitBreaker()
+    breaker.trip("quotaExceeded")
+    monkeypatch.setattr(ratelimit, "quota_day", lambda: "2024-01-02")
+    breaker.check("youtube")
+    with pytest.raises(ratelimit.QuotaExhaustedError):
+        breaker.check("youtube")   # while the probe is out
+    breaker.release()
+    breaker.check("youtube")       # a retried probe goes through again
+    breaker.on_success()
+    breaker.check("youtube")
+    breaker.check("youtube")